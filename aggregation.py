@@ -0,0 +1,99 @@
+# aggregation.py
+"""Fleet-level queries over a simulated cost matrix.
+
+All functions take the cumulative costs as a (cars, months) float array, as
+returned by `cost_calculator.fleet_cost_matrix` or `cost_matrix(df_cost)`.
+Months are 1-based in results, matching the dashboard's x-axis.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# Upper bound on the (chunk, cars, months) difference block in break_even_months
+_PAIR_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def cost_matrix(df_cost: pl.DataFrame) -> np.ndarray:
+    """(cars, months) array from simulate_costs_for_fleet's list column"""
+    series = df_cost["total_costs_over_time"]
+    width = series.list.len().max() or 0
+    return series.list.to_array(width).to_numpy()
+
+
+def cheapest(costs: np.ndarray, n: int, month: int = -1) -> np.ndarray:
+    """Row indices of the `n` cheapest cars at `month` (-1 = horizon), cheapest first"""
+    totals = costs[:, month]
+    n = min(n, len(totals))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(totals, n - 1)[:n]
+    return top[np.argsort(totals[top], kind="stable")]
+
+
+def cost_per_km(costs: np.ndarray, n_kilometer_per_year: int) -> np.ndarray:
+    """Cumulative cost per driven km, for every car and month"""
+    km_driven = np.arange(1, costs.shape[1] + 1) * (n_kilometer_per_year / 12)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return costs / km_driven
+
+
+def months_within_budget(costs: np.ndarray, budget: float) -> np.ndarray:
+    """Months each car can run before its cumulative cost exceeds `budget`"""
+    # Cumulative costs are non-decreasing, so the months within budget are a prefix
+    return (np.asarray(costs) <= budget).sum(axis=1, dtype=np.int32)
+
+
+def break_even_months(costs: np.ndarray) -> np.ndarray:
+    """(cars, cars) matrix of the first month where the cheaper car of a pair flips.
+
+    Entry [i, j] is the 1-based month at which the sign of costs[i] - costs[j]
+    first differs from month 1, or 0 if the ordering never changes. The matrix
+    is symmetric.
+    """
+    n_cars, n_months = costs.shape
+    result = np.zeros((n_cars, n_cars), dtype=np.int32)
+    if n_months == 0:
+        return result
+
+    # Compare instead of subtracting: bool blocks are 8x smaller than float ones
+    chunk = max(1, _PAIR_BLOCK_BYTES // max(1, n_cars * n_months))
+    for start in range(0, n_cars, chunk):
+        stop = min(start + chunk, n_cars)
+        # Only pairs (i, j) with j > i; the lower triangle is mirrored below
+        below = costs[start:stop, None, :] < costs[None, start:, :]
+        flipped = below != below[:, :, :1]
+        first = np.argmax(flipped, axis=2)
+        hit = np.take_along_axis(flipped, first[:, :, None], axis=2)[:, :, 0]
+        block = np.where(hit, first + 1, 0)
+        result[start:stop, start:] = np.triu(block, k=1)
+    return result + result.T
+
+
+def break_even_month(costs_a: np.ndarray, costs_b: np.ndarray) -> int:
+    """First month where the cheaper of two cost series flips, or 0 if never"""
+    return int(break_even_months(np.vstack([costs_a, costs_b]))[0, 1])
+
+
+def rank_fleet(
+    df_cost: pl.DataFrame, n: int | None = None, month: int = -1
+) -> pl.DataFrame:
+    """Cheapest `n` cars (all if None) at `month`, with total cost and cost per km"""
+    import polars as pl
+
+    costs = cost_matrix(df_cost)
+    top = cheapest(costs, len(costs) if n is None else n, month)
+    n_kilometer_per_year = df_cost["n_kilometer_per_year"][0] if len(costs) else 0
+    per_km = cost_per_km(costs[top], n_kilometer_per_year)[:, month]
+    return df_cost[top].select(
+        pl.Series("rank", np.arange(1, len(top) + 1)),
+        "id",
+        "name",
+        pl.Series("total_cost", costs[top, month]),
+        pl.Series("cost_per_km", per_km),
+    )
@@ -1,17 +1,35 @@
 # alembic/env.py
 from sqlalchemy import engine_from_config, pool
 from alembic import context
-import os
 
 # Your SQLAlchemy models
-from models import Base  # Import your declarative base
+from models import Base, DATABASE_URL  # Import your declarative base
 
 config = context.config
 
-# Override with environment variable or hardcode path
-config.set_main_option(
-    "sqlalchemy.url", os.getenv("DATABASE_URL", "sqlite:///./db/cars.db")
-)
+# Override with environment variable or hardcode path. A tenant shard comes
+# from db.tenants.migrate_tenant, or: alembic -x tenant=<name> upgrade head
+# for a shard that already exists. New shards are created empty by
+# `python cli.py migrate --tenants <name>` (create_tenant()); replaying the
+# chain here would seed them with the demo cars.
+url = config.attributes.get("url")
+tenant = context.get_x_argument(as_dictionary=True).get("tenant")
+if tenant:
+    from sqlalchemy import inspect
+    from alembic.util import CommandError
+    from db.tenants import get_tenant_engine, tenant_url
+
+    hint = f"create it with `python cli.py migrate --tenants {tenant}`"
+    try:
+        is_managed = inspect(get_tenant_engine(tenant)).has_table("alembic_version")
+    except ValueError as error:  # Invalid tenant name
+        raise CommandError(str(error)) from None
+    except LookupError:
+        raise CommandError(f"Tenant {tenant!r} has no database; {hint}") from None
+    if not is_managed:
+        raise CommandError(f"Tenant {tenant!r} is not under Alembic yet; {hint}")
+    url = tenant_url(tenant)
+config.set_main_option("sqlalchemy.url", (url or DATABASE_URL).replace("%", "%%"))
 
 target_metadata = Base.metadata  # This is key for autogenerate!
 
@@ -0,0 +1,37 @@
+"""add lease columns
+
+Revision ID: 3b9e41c07d2a
+Revises: 7dc425a8916e
+Create Date: 2026-10-19 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e41c07d2a'
+down_revision: Union[str, Sequence[str], None] = '7dc425a8916e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('cars') as batch_op:
+        batch_op.add_column(sa.Column('monthly_lease', sa.Float(), nullable=True))
+        batch_op.add_column(
+            sa.Column('is_ev', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+    # Seeded EVs from the first revision
+    op.execute("UPDATE cars SET is_ev = 1 WHERE name IN ('tesla_model_3', 'opel_corsa_e')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('cars') as batch_op:
+        batch_op.drop_column('is_ev')
+        batch_op.drop_column('monthly_lease')
@@ -0,0 +1,47 @@
+"""add car changes log
+
+Revision ID: c41f7a9e2b63
+Revises: 3b9e41c07d2a
+Create Date: 2026-10-19 14:03:21.508114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7a9e2b63'
+down_revision: Union[str, Sequence[str], None] = '3b9e41c07d2a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    changes_table = op.create_table('car_changes',
+        sa.Column('revision', sa.Integer(), nullable=False),
+        sa.Column('car_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('changed_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('revision'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(op.f('ix_car_changes_car_id'), 'car_changes', ['car_id'], unique=False)
+
+    # Backfill: the existing cars become the inserts of revisions 1..n
+    cars = sa.Table('cars', sa.MetaData(), autoload_with=op.get_bind())
+    rows = op.get_bind().execute(sa.select(cars).order_by(cars.c.id)).mappings().all()
+    if rows:
+        op.bulk_insert(changes_table, [
+            {'car_id': row['id'], 'operation': 'insert', 'data': dict(row)}
+            for row in rows
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_car_changes_car_id'), table_name='car_changes')
+    op.drop_table('car_changes')
@@ -0,0 +1,310 @@
+# api.py
+"""HTTP API for fleet costs, mounted on the Dash Flask server (see main.py).
+
+    GET /api/fleet/costs?years=5&km=15000[&series=1][&name=..][&type=..]
+    GET /api/cars/<id>/costs?years=5&km=15000
+    GET /api/sweep?years=3,5,8&km=10000,20000[&name=..][&type=..]
+
+All take an optional `backend` (see kernels.py), and read the fleet of the
+tenant named by the X-Tenant header (the app's own database without it).
+Responses are an Arrow IPC stream for clients that send
+Accept: application/vnd.apache.arrow.stream and a JSON array of row objects
+otherwise: flat rows through Polars' JSON writer, rows with monthly series
+through orjson when installed.
+ETags combine the fleet revision with the query, so an unchanged result is a
+304 without simulating. Large results are serialized and sent one slice at a
+time; bodies sent in one piece report compute and serialization time in
+Server-Timing.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from werkzeug.exceptions import BadRequest, HTTPException, NotFound, UnprocessableEntity
+
+from cache import make_key
+from cost_calculator import fleet_cost_matrix
+from db.operations import get_car_record, get_fleet_arrays, get_fleet_revision
+from models import get_engine
+
+if TYPE_CHECKING:
+    import polars as pl
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+TENANT_HEADER = "X-Tenant"
+
+MAX_YEARS = 50
+MAX_KM = 1_000_000
+MAX_SWEEP_SCENARIOS = 400
+# Responses with more rows are serialized and sent one slice at a time
+STREAM_CHUNK_ROWS = 5_000
+# Arrow IPC end-of-stream marker: continuation token and a zero metadata length
+_ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+try:
+    import orjson
+except ImportError:  # Plain json is several times slower on series
+    orjson = None
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+
+@api.errorhandler(HTTPException)
+def _http_error(error: HTTPException):
+    response = jsonify(error=error.description)
+    response.status_code = error.code
+    return response
+
+
+def _int_args(name: str, default: int, upper: int) -> list[int]:
+    """Repeated or comma-separated integer query args, each within [0, upper]"""
+    values = [
+        part
+        for value in request.args.getlist(name)
+        for part in value.split(",")
+        if part.strip()
+    ]
+    try:
+        numbers = [int(value) for value in values] or [default]
+    except ValueError:
+        raise BadRequest(f"{name} must be integers") from None
+    if not all(0 <= number <= upper for number in numbers):
+        raise BadRequest(f"{name} must be between 0 and {upper}")
+    return numbers
+
+
+def _tenant() -> str | None:
+    """Tenant named in the request, checked to have a database"""
+    tenant = request.headers.get(TENANT_HEADER) or None
+    if tenant is not None:
+        try:
+            get_engine(tenant)
+        except ValueError as error:
+            raise BadRequest(str(error)) from None
+        except LookupError as error:
+            raise NotFound(str(error)) from None
+    return tenant
+
+
+def _scenario() -> tuple[int, int]:
+    years = _int_args("years", 5, MAX_YEARS)
+    kms = _int_args("km", 15_000, MAX_KM)
+    if len(years) != 1 or len(kms) != 1:
+        raise BadRequest("Give one value for years and km; use /api/sweep for more")
+    if years[0] < 1:
+        raise BadRequest("years must be at least 1")
+    return years[0], kms[0]
+
+
+def _costs(fleet, n_years: int, n_kilometer_per_year: int) -> np.ndarray:
+    try:
+        return fleet_cost_matrix(
+            fleet, n_years, n_kilometer_per_year, request.args.get("backend")
+        )
+    except ValueError as error:  # Unknown backend
+        raise BadRequest(str(error)) from None
+
+
+def _fleet(tenant: str | None):
+    """Cars matching the name/type filters; 422 if some cannot be simulated"""
+    try:
+        return get_fleet_arrays(
+            request.args.get("name"), request.args.get("type"), tenant
+        )
+    except ValueError as error:  # NULL dates in the cars table
+        raise UnprocessableEntity(str(error)) from None
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=np.ndarray.tolist).encode()
+
+
+def _json_array(df: pl.DataFrame) -> bytes:
+    """The frame as a JSON array of row objects"""
+    import polars as pl
+
+    list_columns = [n for n, dtype in df.schema.items() if isinstance(dtype, pl.List)]
+    if not list_columns:
+        # Flat rows: Polars' own writer beats building dicts for orjson
+        return df.write_json().encode()
+    # Series go through numpy: orjson writes float arrays without boxing
+    columns = [
+        df[name].list.to_array(df[name].list.len().max() or 0).to_numpy()
+        if name in list_columns
+        else df[name].to_list()
+        for name in df.columns
+    ]
+    return _dumps([dict(zip(df.columns, values)) for values in zip(*columns)])
+
+
+def _arrow_stream(df: pl.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.write_ipc_stream(buffer)
+    return buffer.getvalue()
+
+
+def _slices(df: pl.DataFrame):
+    for start in range(0, df.height, STREAM_CHUNK_ROWS):
+        yield df.slice(start, STREAM_CHUNK_ROWS)
+
+
+def _stream_json(df: pl.DataFrame):
+    """JSON array, serialized one slice at a time: "[" a "," b "," c "]" """
+    separator = b"["
+    for part in _slices(df):
+        yield separator + _json_array(part)[1:-1]
+        separator = b","
+    yield b"]"
+
+
+def _stream_arrow(df: pl.DataFrame):
+    """One Arrow IPC stream, serialized one slice at a time.
+
+    Every slice is written as its own stream (schema, record batch, EOS); the
+    first keeps its schema message, later ones contribute only their batches.
+    The schema message has no body, so it ends after its 8-byte prefix and
+    metadata. Frames here have no dictionary-encoded columns.
+    """
+    for index, part in enumerate(_slices(df)):
+        stream = _arrow_stream(part)[: -len(_ARROW_EOS)]
+        if index:
+            schema_length = int.from_bytes(stream[4:8], "little")
+            stream = stream[8 + schema_length :]
+        yield stream
+    yield _ARROW_EOS
+
+
+def _respond(endpoint: str, tenant: str | None, compute) -> Response:
+    """Shared flow: content negotiation, ETag check, compute, serialize, stream"""
+    mimetype = request.accept_mimetypes.best_match([JSON, ARROW_STREAM]) or JSON
+    revision = get_fleet_revision(tenant)
+    query = sorted(request.args.items(multi=True))
+    etag = make_key("api", endpoint, tenant, revision, mimetype, query)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        start = time.perf_counter()
+        df = compute()
+        computed = time.perf_counter()
+        if df.height > STREAM_CHUNK_ROWS:
+            # Sent with chunked encoding while later slices are still serialized;
+            # headers go out first, so there is no serialization time to report
+            stream = _stream_arrow if mimetype == ARROW_STREAM else _stream_json
+            response = Response(stream_with_context(stream(df)), mimetype=mimetype)
+        else:
+            body = _arrow_stream(df) if mimetype == ARROW_STREAM else _json_array(df)
+            serialized = time.perf_counter()
+            response = Response(body, mimetype=mimetype)
+            response.headers["Server-Timing"] = (
+                f"compute;dur={(computed - start) * 1000:.1f}, "
+                f"serialize;dur={(serialized - computed) * 1000:.1f}"
+            )
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = f"Accept, {TENANT_HEADER}"
+    response.headers["X-Fleet-Revision"] = str(revision)
+    return response
+
+
+@api.get("/fleet/costs")
+def fleet_costs():
+    """Final cost per car for one scenario; with series=1 also the monthly series"""
+    n_years, n_kilometer_per_year = _scenario()
+    tenant = _tenant()
+    with_series = request.args.get("series", "0").lower() in ("1", "true", "yes")
+
+    def compute():
+        import polars as pl
+
+        fleet = _fleet(tenant)
+        costs = _costs(fleet, n_years, n_kilometer_per_year)
+        df = pl.DataFrame(
+            {
+                "id": fleet.id,
+                "name": fleet.name,
+                "type": fleet.type,
+                "n_years": np.full(len(fleet), n_years),
+                "n_kilometer_per_year": np.full(len(fleet), n_kilometer_per_year),
+                "final_cost": costs[:, -1],
+            },
+            schema_overrides={"name": pl.String, "type": pl.String},
+        )
+        if with_series:
+            df = df.with_columns(
+                pl.Series("total_costs_over_time", costs).cast(pl.List(pl.Float64))
+            )
+        return df
+
+    return _respond("fleet_costs", tenant, compute)
+
+
+@api.get("/cars/<int:car_id>/costs")
+def car_costs(car_id: int):
+    """One car's cumulative cost per month"""
+    from fleet import FleetArrays
+
+    n_years, n_kilometer_per_year = _scenario()
+    tenant = _tenant()
+    record = get_car_record(car_id, tenant)
+    if record is None:
+        raise NotFound(f"Car {car_id} not found")
+
+    def compute():
+        import polars as pl
+
+        try:
+            fleet = FleetArrays.from_records([record])
+        except ValueError as error:  # NULL dates in the cars table
+            raise UnprocessableEntity(f"Car {car_id}: {error}") from None
+        costs = _costs(fleet, n_years, n_kilometer_per_year)
+        return pl.DataFrame(
+            {"month": np.arange(1, costs.shape[1] + 1), "total_cost": costs[0]}
+        )
+
+    return _respond(f"car_costs/{car_id}", tenant, compute)
+
+
+@api.get("/sweep")
+def sweep():
+    """Final cost per car for every combination of years and km"""
+    years = sorted(set(_int_args("years", 5, MAX_YEARS)))
+    kms = sorted(set(_int_args("km", 15_000, MAX_KM)))
+    if years[0] < 1:
+        raise BadRequest("years must be at least 1")
+    if len(years) * len(kms) > MAX_SWEEP_SCENARIOS:
+        raise BadRequest(f"At most {MAX_SWEEP_SCENARIOS} scenarios per sweep")
+    tenant = _tenant()
+
+    def compute():
+        import polars as pl
+
+        fleet = _fleet(tenant)
+        frames = []
+        for km in kms:
+            # Series are cumulative, so one run to the longest horizon covers all
+            costs = _costs(fleet, years[-1], km)
+            for n_years in years:
+                frames.append(
+                    pl.DataFrame(
+                        {
+                            "id": fleet.id,
+                            "name": fleet.name,
+                            "n_years": np.full(len(fleet), n_years),
+                            "n_kilometer_per_year": np.full(len(fleet), km),
+                            "final_cost": costs[:, n_years * 12 - 1],
+                        },
+                        schema_overrides={"name": pl.String},
+                    )
+                )
+        return pl.concat(frames)
+
+    return _respond("sweep", tenant, compute)
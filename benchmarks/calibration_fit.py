@@ -0,0 +1,101 @@
+# benchmarks/calibration_fit.py
+"""Calibration check: fit_depreciation on noisy synthetic listings.
+
+Prices come from `depreciate_value` (exponential decay with the residual
+floor) times log-normal noise, at ages up to --max-age months, so many
+listings of fast-depreciating models sit on the floor. Fails if any model's
+fitted depreciation_k is off by more than --tolerance, and reports the fit's
+run time per noise level.
+
+Usage:
+    python benchmarks/calibration_fit.py
+    python benchmarks/calibration_fit.py --models 500 --listings 5000 --noise 0 0.1
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calibration import fit_depreciation  # noqa: E402
+from cost_calculator import depreciate_value  # noqa: E402
+from scenarios import RESIDUAL_PERCENTAGE  # noqa: E402
+
+
+def synthetic_listings(
+    rng: np.random.Generator,
+    true_k: np.ndarray,
+    n_listings: int,
+    max_age: int,
+    noise: float,
+) -> pl.DataFrame:
+    """`n_listings` listings per model, priced by depreciate_value plus noise"""
+    model = np.repeat(np.arange(len(true_k)), n_listings)
+    age_months = rng.integers(1, max_age + 1, len(model))
+    purchase_price = rng.uniform(15_000, 80_000, len(model)).round(0)
+    value = np.array(
+        [
+            depreciate_value(p, age, k, RESIDUAL_PERCENTAGE)[0]
+            for p, age, k in zip(purchase_price, age_months, true_k[model])
+        ]
+    )
+    return pl.DataFrame(
+        {
+            "model": [f"model_{i}" for i in model],
+            "age_months": age_months,
+            "price": value * rng.lognormal(0.0, noise, len(model)),
+            "purchase_price": purchase_price,
+        }
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, default=100)
+    parser.add_argument("--listings", type=int, default=1_000)
+    parser.add_argument("--max-age", type=int, default=180)
+    parser.add_argument("--noise", type=float, nargs="+", default=[0, 0.01, 0.05])
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    # Slow to fast depreciation; fast models reach the floor within a few years
+    true_k = np.linspace(0.02, 0.6, args.models)
+    expected = pl.DataFrame(
+        {"model": [f"model_{i}" for i in range(args.models)], "true_k": true_k}
+    )
+
+    ok = True
+    print(f"{'noise':>6} {'models':>7} {'max |dk|':>9} {'worst k':>8} {'fit s':>7}")
+    for noise in args.noise:
+        listings = synthetic_listings(rng, true_k, args.listings, args.max_age, noise)
+        start = time.perf_counter()
+        fits = fit_depreciation(listings)
+        elapsed = time.perf_counter() - start
+
+        errors = fits.join(expected, on="model", how="right").with_columns(
+            (pl.col("depreciation_k") - pl.col("true_k")).abs().alias("error")
+        )
+        worst = errors.sort("error", descending=True, nulls_last=False).row(
+            0, named=True
+        )
+        max_error = worst["error"]
+        passed = max_error is not None and max_error <= args.tolerance
+        ok = ok and passed
+        print(
+            f"{noise:>6.2f} {fits.height:>7} {max_error or float('nan'):>9.4f} "
+            f"{worst['true_k']:>8.3f} {elapsed:>7.3f}{'' if passed else '  FAILED'}"
+        )
+
+    print("\nOK" if ok else "\nFAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
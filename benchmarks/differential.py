@@ -0,0 +1,223 @@
+# benchmarks/differential.py
+"""Differential harness: every fast cost engine against the reference loop.
+
+Generates random fleets and horizons (property-based, seeded), runs each
+engine and the reference `cost_over_time` on them, and fails if any cumulative
+cost differs by more than kernels.VALIDATION_ATOL. The same run reports each
+engine's speedup over the reference, so performance work can land safely.
+
+Buy cars are checked against `cost_over_time`. Fleets with lease cars (which
+the reference does not model) are checked against the numpy engine.
+
+Usage:
+    python benchmarks/differential.py
+    python benchmarks/differential.py --cases 500 --seed 7 --engines numpy numba
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregation import cost_matrix  # noqa: E402
+from cli import _simulate_chunk  # noqa: E402
+from cost_calculator import simulate_costs_for_fleet  # noqa: E402
+from fleet import FleetArrays  # noqa: E402
+from kernels import (  # noqa: E402
+    VALIDATION_ATOL,
+    numba_cost_matrix,
+    numpy_cost_matrix,
+    python_cost_matrix,
+    reference_cost_matrix,
+)
+
+ENGINES = ("numpy", "numba", "python", "polars", "parallel")
+
+
+@dataclass
+class Case:
+    seed: int
+    fleet: FleetArrays
+    n_years: int
+    n_kilometer_per_year: int
+
+
+def random_fleet(rng: np.random.Generator, n_cars: int, lease_share: float = 0.0):
+    """Random cars, including edge cases: brand new, very old, floored, free"""
+    build_year = rng.integers(1990, 2030, n_cars, dtype=np.int32)
+    purchase_cost = rng.choice(
+        [0.0, rng.uniform(500, 150_000)], n_cars, p=[0.02, 0.98]
+    ) * rng.uniform(0.2, 1.0, n_cars)
+    return FleetArrays(
+        id=np.arange(1, n_cars + 1, dtype=np.int32),
+        name=np.array([f"car_{i}" for i in range(n_cars)], dtype=object),
+        type=np.where(rng.random(n_cars) < lease_share, "lease", "buy").astype(object),
+        build_year=build_year,
+        build_month=rng.integers(1, 13, n_cars, dtype=np.int32),
+        # Mostly bought after the build date, occasionally pre-ordered
+        buy_year=build_year + rng.integers(-1, 25, n_cars, dtype=np.int32),
+        buy_month=rng.integers(1, 13, n_cars, dtype=np.int32),
+        purchase_cost=purchase_cost.round(rng.integers(0, 3)),
+        road_taxes_yearly=rng.uniform(0, 3_000, n_cars).round(2),
+        insurance_monthly=rng.uniform(0, 500, n_cars).round(2),
+        fuel_per_km=rng.uniform(0, 0.4, n_cars).round(3),
+        depreciation_k=rng.uniform(0, 0.6, n_cars),
+        monthly_lease=rng.uniform(100, 1_500, n_cars).round(2),
+        is_ev=rng.random(n_cars) < 0.5,
+    )
+
+
+def generate_cases(n_cases: int, seed: int, lease: bool) -> list[Case]:
+    cases = []
+    for i in range(n_cases):
+        rng = np.random.default_rng([seed, i])
+        fleet = random_fleet(
+            rng, int(rng.integers(1, 64)), lease_share=0.3 if lease else 0.0
+        )
+        cases.append(
+            Case(
+                seed=i,
+                fleet=fleet,
+                n_years=int(rng.integers(1, 16)),
+                n_kilometer_per_year=int(rng.integers(0, 60_000)),
+            )
+        )
+    return cases
+
+
+def fleet_frame(fleet: FleetArrays) -> pl.DataFrame:
+    return pl.DataFrame(
+        {name: getattr(fleet, name) for name in FleetArrays.__dataclass_fields__}
+    )
+
+
+def run_polars(fleet, n_years, n_kilometer_per_year):
+    df = simulate_costs_for_fleet(fleet_frame(fleet), n_years, n_kilometer_per_year)
+    return cost_matrix(df)
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def run_parallel(fleet, n_years, n_kilometer_per_year, chunk_size=8):
+    """The CLI's process-pool path: fleet slices simulated in worker processes"""
+    df = fleet_frame(fleet)
+    tasks = [
+        (df.slice(offset, chunk_size), n_years, n_kilometer_per_year, None, None)
+        for offset in range(0, df.height, chunk_size)
+    ]
+    return np.vstack([cost_matrix(part) for part in _pool.map(_simulate_chunk, tasks)])
+
+
+RUNNERS = {
+    "numpy": numpy_cost_matrix,
+    "numba": numba_cost_matrix,
+    "python": python_cost_matrix,
+    "polars": run_polars,
+    "parallel": run_parallel,
+}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def shrink(case: Case, engine, expected_func) -> str:
+    """Narrow a failure down to the first failing car and month"""
+    for index in range(len(case.fleet)):
+        single = replace(case, fleet=case.fleet.take([index]))
+        args = (single.fleet, single.n_years, single.n_kilometer_per_year)
+        diff = np.abs(engine(*args) - expected_func(*args))[0]
+        if diff.max() > VALIDATION_ATOL:
+            month = int(np.argmax(diff > VALIDATION_ATOL)) + 1
+            return (
+                f"car {single.fleet.record(0)}, n_years={case.n_years}, "
+                f"km={case.n_kilometer_per_year}: first off at month {month} "
+                f"by {diff[month - 1]:.4f}"
+            )
+    return "failure only reproduces with the whole fleet"
+
+
+def check(cases: list[Case], engines: list[str], lease: bool) -> bool:
+    """Compare engines on every case; print speedups; return True if all agree"""
+    expected_func = numpy_cost_matrix if lease else reference_cost_matrix
+    label = "numpy engine" if lease else "reference"
+    ok = True
+    times = {name: [] for name in engines}
+    reference_times = []
+
+    for case in cases:
+        args = (case.fleet, case.n_years, case.n_kilometer_per_year)
+        expected, reference_time = timed(expected_func, *args)
+        reference_times.append(reference_time)
+        for name in engines:
+            actual, elapsed = timed(RUNNERS[name], *args)
+            times[name].append(elapsed)
+            error = float(np.max(np.abs(actual - expected), initial=0.0))
+            if not error <= VALIDATION_ATOL:
+                ok = False
+                print(f"FAIL {name} vs {label}, case {case.seed}: max error {error}")
+                print("    " + shrink(case, RUNNERS[name], expected_func))
+
+    fleet_label = "mixed buy/lease fleets" if lease else "buy fleets"
+    print(f"\n{len(cases)} {fleet_label}, checked against the {label}")
+    print(f"{'engine':<12} {'total s':>9} {'speedup':>9}")
+    total_reference = sum(reference_times)
+    print(f"{label:<12} {total_reference:>9.3f} {1:>8.1f}x")
+    for name in engines:
+        total = sum(times[name])
+        median_ratio = statistics.median(
+            r / e for r, e in zip(reference_times, times[name]) if e > 0
+        )
+        print(
+            f"{name:<12} {total:>9.3f} {total_reference / total:>8.1f}x"
+            f"   (median per case {median_ratio:.1f}x)"
+        )
+    return ok
+
+
+def main(argv: list[str] | None = None) -> int:
+    global _pool
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    args = parser.parse_args(argv)
+
+    if "parallel" in args.engines:
+        _pool = ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context("spawn")
+        )
+    if "numba" in args.engines:
+        # Compile (or load the cached build) outside the timed region
+        numba_cost_matrix(random_fleet(np.random.default_rng(0), 1), 1, 0)
+
+    try:
+        ok = check(
+            generate_cases(args.cases, args.seed, lease=False), args.engines, False
+        )
+        lease_engines = [e for e in args.engines if e != "numpy"]
+        if lease_engines:
+            cases = generate_cases(args.cases, args.seed + 1, lease=True)
+            ok = check(cases, lease_engines, lease=True) and ok
+    finally:
+        if _pool is not None:
+            _pool.shutdown()
+
+    print("\nOK" if ok else "\nFAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# benchmarks/import_time.py
+"""Cold-start import benchmark for the entry points and worker modules.
+
+Every sample runs `python -X importtime -c "import <module>"` in a fresh
+interpreter, so it measures what an autoscaled worker or a process-pool child
+pays on startup.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 cost_calculator cli
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ["cost_calculator", "models", "db.operations", "cli", "main"]
+HEAVY_MODULES = ["numpy", "polars", "sqlalchemy", "dash", "plotly"]
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """Import `module` in a fresh interpreter; return (seconds, heavy modules loaded)"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    top_level = module.split(".")[0]
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == top_level:
+            cumulative_us = int(parts[1])
+    if top_level != module:
+        for line in proc.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                cumulative_us += int(parts[1])
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative_us / 1e6, loaded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<18} {'median ms':>10} {'min ms':>8}  heavy deps loaded")
+    for module in args.modules:
+        samples, loaded = [], []
+        for _ in range(args.repeat):
+            seconds, loaded = measure(module)
+            samples.append(seconds)
+        print(
+            f"{module:<18} {statistics.median(samples) * 1e3:>10.1f} "
+            f"{min(samples) * 1e3:>8.1f}  {', '.join(loaded) or '-'}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# benchmarks/load_test.py
+"""Throughput of the production server as the gunicorn worker count grows.
+
+For each worker count this starts `gunicorn wsgi:server`, then hammers the
+dashboard callback from client threads for a fixed duration and reports
+requests per second. Scenarios repeat across requests, so workers also
+exercise the shared result cache.
+
+Usage:
+    python benchmarks/load_test.py --workers 1 2 4 8 --duration 10
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = list(itertools.product([5000, 15000, 30000], [3, 5, 10], [True, False]))
+
+
+def wait_until_up(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base_url + "/_dash-dependencies", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not come up")
+
+
+def dashboard_callback(base_url: str) -> dict:
+    """Find the dashboard callback spec the browser would call"""
+    with urllib.request.urlopen(base_url + "/_dash-dependencies") as resp:
+        dependencies = json.load(resp)
+    return next(d for d in dependencies if "cost-graph.figure" in d["output"])
+
+
+def build_payload(callback: dict, km: int, years: int, cumulative: bool) -> bytes:
+    values = {"km-slider": km, "years-slider": years, "cumulative-toggle": cumulative}
+    outputs = [
+        {"id": part.split(".")[0], "property": part.split(".")[1]}
+        for part in callback["output"].strip(".").split("...")
+    ]
+    payload = {
+        "output": callback["output"],
+        "outputs": outputs,
+        "inputs": [dict(i, value=values[i["id"]]) for i in callback["inputs"]],
+        "changedPropIds": [f"{callback['inputs'][0]['id']}.value"],
+        "state": callback["state"],
+    }
+    return json.dumps(payload).encode()
+
+
+def hammer(base_url: str, payloads: list[bytes], duration: float, threads: int):
+    """Fire callback requests from `threads` clients; return (ok, errors)"""
+    counts = {"ok": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset: int):
+        for payload in itertools.islice(itertools.cycle(payloads), offset, None):
+            if time.monotonic() >= deadline:
+                return
+            request = urllib.request.Request(
+                base_url + "/_dash-update-component",
+                data=payload,
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                urllib.request.urlopen(request, timeout=30).read()
+                key = "ok"
+            except OSError:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    pool = [threading.Thread(target=client, args=(i * 7,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return counts["ok"], counts["errors"]
+
+
+def run(n_workers: int, args: argparse.Namespace) -> float:
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = dict(
+        os.environ, WEB_CONCURRENCY=str(n_workers), BIND=f"127.0.0.1:{args.port}"
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:server"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(base_url)
+        callback = dashboard_callback(base_url)
+        payloads = [build_payload(callback, *s) for s in SCENARIOS]
+        ok, errors = hammer(base_url, payloads, args.duration, args.threads)
+    finally:
+        server.terminate()
+        server.wait()
+    rps = ok / args.duration
+    print(f"{n_workers:>7} {rps:>10.1f} {errors:>7}")
+    return rps
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    print(f"{'workers':>7} {'req/s':>10} {'errors':>7}")
+    for n_workers in args.workers:
+        run(n_workers, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# benchmarks/tenant_writes.py
+"""Write throughput: N writer processes on one shared database vs one each.
+
+Every writer inserts cars one transaction at a time through db.operations.
+With a single database they all queue on its SQLite write lock; with one
+tenant database per writer, throughput should grow with the writer count.
+
+Usage:
+    python benchmarks/tenant_writes.py
+    python benchmarks/tenant_writes.py --writers 1 2 4 8 --writes 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+CAR = {
+    "name": "bench_car",
+    "type": "buy",
+    "build_year": 2020,
+    "build_month": 1,
+    "buy_year": 2024,
+    "buy_month": 1,
+    "purchase_cost": 25_000.0,
+    "road_taxes_yearly": 600.0,
+    "insurance_monthly": 100.0,
+    "fuel_per_km": 0.1,
+    "depreciation_k": 0.1,
+}
+
+
+def write_cars(task: tuple[str, int]) -> float:
+    """Worker: insert `n_writes` cars into a tenant's db; returns seconds taken"""
+    from db.operations import create_car
+
+    tenant, n_writes = task
+    start = time.perf_counter()
+    for _ in range(n_writes):
+        create_car(CAR, tenant=tenant)
+    return time.perf_counter() - start
+
+
+def run(n_writers: int, n_writes: int, shared: bool) -> float:
+    """Writes per second for `n_writers` concurrent processes"""
+    from db.tenants import migrate_all
+
+    tenants = ["shared"] if shared else [f"tenant{i}" for i in range(n_writers)]
+    migrate_all(tenants)
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_writers, mp_context=spawn) as pool:
+        # Warm up every worker (imports, engine) outside the timed region
+        list(pool.map(write_cars, [(tenants[0], 1)] * n_writers))
+        tasks = [(tenants[0 if shared else i], n_writes) for i in range(n_writers)]
+        start = time.perf_counter()
+        list(pool.map(write_cars, tasks))
+        elapsed = time.perf_counter() - start
+    return n_writers * n_writes / elapsed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"{'writers':>8} {'shared db/s':>12} {'per-tenant/s':>13}")
+    for n_writers in args.writers:
+        rates = []
+        for shared in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                # Migrations and writes run in spawned workers, which read this
+                os.environ["TENANT_DATABASE_URL"] = f"sqlite:///{tmp}/{{tenant}}.db"
+                rates.append(run(n_writers, args.writes, shared))
+        print(f"{n_writers:>8} {rates[0]:>12.0f} {rates[1]:>13.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# cache.py
+"""Cross-process result cache backed by a local SQLite file.
+
+Gunicorn workers share simulation results and fleet snapshots through this
+file instead of each recomputing them. Frames are stored as Arrow IPC blobs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import sqlite3
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import polars as pl
+
+CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "./db/result_cache.db")
+MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+
+_connection: sqlite3.Connection | None = None
+_connection_pid: int | None = None
+
+
+def _connect() -> sqlite3.Connection:
+    """One connection per process; reconnect after fork"""
+    global _connection, _connection_pid
+    if _connection is None or _connection_pid != os.getpid():
+        conn = sqlite3.connect(CACHE_PATH, timeout=30, check_same_thread=False)
+        # WAL lets readers in other workers proceed while one worker writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        _connection, _connection_pid = conn, os.getpid()
+    return _connection
+
+
+def make_key(*parts) -> str:
+    """Stable cache key from arbitrary repr-able parts"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def get_frame(key: str) -> pl.DataFrame | None:
+    """Return the cached frame for `key`, or None on a miss"""
+    import polars as pl
+
+    row = (
+        _connect().execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+    )
+    if row is None:
+        return None
+    return pl.read_ipc(io.BytesIO(row[0]))
+
+
+def put_frame(key: str, df: pl.DataFrame) -> None:
+    """Store a frame, evicting the oldest entries beyond MAX_ENTRIES"""
+    buffer = io.BytesIO()
+    df.write_ipc(buffer)
+    conn = _connect()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+            (key, buffer.getvalue(), time.time()),
+        )
+        conn.execute(
+            "DELETE FROM results WHERE key NOT IN "
+            "(SELECT key FROM results ORDER BY created DESC LIMIT ?)",
+            (MAX_ENTRIES,),
+        )
+
+
+def cached_frame(key: str, compute: Callable[[], pl.DataFrame]) -> pl.DataFrame:
+    """Return the cached frame for `key`, computing and storing it on a miss"""
+    df = get_frame(key)
+    if df is None:
+        df = compute()
+        put_frame(key, df)
+    return df
+
+
+def clear() -> None:
+    """Drop every cached entry"""
+    conn = _connect()
+    with conn:
+        conn.execute("DELETE FROM results")
@@ -0,0 +1,113 @@
+# calibration.py
+"""Fit per-model depreciation_k from observed resale listings.
+
+Listings need the columns: model, age_months, price, purchase_price.
+The model is `depreciate_value`'s exponential, value = p * exp(-k * t) with the
+mid-month time t = (age_months - 0.5) / 12, floored at the residual value.
+Taking logs gives y = -ln(price / p) = k * t, so every model's k is a
+least-squares slope through the origin: k = sum(t * y) / sum(t * t).
+
+That only holds before the floor age t* = -ln(residual) / k. A floored car's
+observed price scatters around the floor, so a price cut-off cannot tell it
+apart from a car still depreciating, and its y ~ -ln(residual) drags the
+slope down. The fit therefore selects by age: a first slope from listings
+well above the floor gives each model's t*, listings from FLOOR_MARGIN before
+t* on are dropped, and the slope is refitted until it converges.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+from scenarios import RESIDUAL_PERCENTAGE
+
+if TYPE_CHECKING:
+    import polars as pl
+
+LISTING_COLUMNS = ("model", "age_months", "price", "purchase_price")
+# Listings younger than (1 - FLOOR_MARGIN) * t* are used; a fit up to 10% low
+# still excludes every floored listing, so the next one is unbiased
+FLOOR_MARGIN = 0.1
+MAX_ITERATIONS = 20
+CONVERGENCE_TOLERANCE = 1e-6
+
+
+def scan_listings(path: str) -> pl.LazyFrame:
+    """Lazily scan a CSV or Parquet file of listings"""
+    import polars as pl
+
+    scan = pl.scan_parquet if path.endswith(".parquet") else pl.scan_csv
+    return scan(path).select(LISTING_COLUMNS)
+
+
+def _fit_slopes(ages: pl.DataFrame) -> pl.DataFrame:
+    """Per model: least-squares k through the origin, listings used, RMSE on y.
+
+    Works on per-(model, age) sums: every listing of an age shares its t, so
+    sum(t * y) = sum(t * sum_y) and sum(t * t) = sum(t * t * n).
+    """
+    import polars as pl
+
+    sum_ty = (pl.col("t") * pl.col("sum_y")).sum()
+    sum_tt = (pl.col("t") ** 2 * pl.col("n")).sum()
+    # Residual sum of squares of the slope fit: sum(y^2) - sum(t y)^2 / sum(t t)
+    sse = pl.col("sum_y2").sum() - sum_ty**2 / sum_tt
+    return ages.group_by("model").agg(
+        (sum_ty / sum_tt).clip(lower_bound=0.0).alias("depreciation_k"),
+        pl.col("n").sum().alias("n_listings"),
+        (sse.clip(lower_bound=0.0) / pl.col("n").sum()).sqrt().alias("rmse_log"),
+    )
+
+
+def fit_depreciation(
+    listings: pl.LazyFrame | pl.DataFrame,
+    residual_percentage: float = RESIDUAL_PERCENTAGE,
+    min_listings: int = 1,
+) -> pl.DataFrame:
+    """One row per model: fitted depreciation_k, listings used and fit RMSE on log value.
+
+    Models with no age clearly above the floor cannot be fitted and are left out.
+    """
+    import polars as pl
+
+    floor_y = -math.log(residual_percentage)  # y of a car on the floor
+    y = -(pl.col("price") / pl.col("purchase_price")).log()
+    # One pass over the listings; the refits below only touch these sums
+    ages = (
+        listings.lazy()
+        .filter(
+            (pl.col("age_months") >= 1)
+            & (pl.col("purchase_price") > 0)
+            & (pl.col("price") > 0)
+        )
+        .group_by("model", "age_months")
+        .agg(pl.len().alias("n"), y.sum().alias("sum_y"), (y**2).sum().alias("sum_y2"))
+        .with_columns(((pl.col("age_months") - 0.5) / 12.0).alias("t"))
+        .collect(engine="streaming")
+    )
+
+    # Ages whose mean price is halfway down to the floor (in log value) are
+    # clearly still depreciating; they give the first estimate of t*
+    fits = _fit_slopes(ages.filter(pl.col("sum_y") / pl.col("n") < floor_y / 2))
+    for _ in range(MAX_ITERATIONS):
+        # k * t < (1 - margin) * floor_y is t < (1 - margin) * t*, and all for k = 0
+        before_floor = ages.join(
+            fits.select("model", "depreciation_k"), on="model"
+        ).filter(pl.col("depreciation_k") * pl.col("t") < (1 - FLOOR_MARGIN) * floor_y)
+        refit = _fit_slopes(before_floor)
+        change = (
+            refit.join(fits, on="model", how="left", suffix="_previous")
+            .select(
+                (pl.col("depreciation_k") - pl.col("depreciation_k_previous")).abs()
+            )
+            .max()
+            .item()
+        )
+        fits = refit
+        # A cut-off right at an age boundary can flip between two neighbouring
+        # fits; MAX_ITERATIONS ends that with either, both within sampling error
+        if change is not None and change < CONVERGENCE_TOLERANCE:
+            break
+
+    return fits.filter(pl.col("n_listings") >= min_listings).sort("model")
@@ -0,0 +1,241 @@
+# cli.py
+"""Headless batch runner for fleet cost reports.
+
+Usage:
+    python cli.py simulate --years 5 --km 15000 --out report.parquet
+    python cli.py simulate --fleet fleet.parquet --years 3 5 8 --km 10000 20000 --out sweep.csv
+    python cli.py simulate --years 3 5 8 --store results/
+    python cli.py simulate --tenant acme --years 5 --out acme.parquet
+    python cli.py migrate --workers 8
+
+Deliberately does not import Dash, Plotly or Bootstrap so nightly jobs stay cheap.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from cost_calculator import simulate_costs_for_fleet
+from kernels import BACKENDS
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from tax_rules import TaxTables
+
+
+def load_fleet(source: str | None = None, tenant: str | None = None) -> pl.DataFrame:
+    """Load the fleet from a Parquet file, a database URL or a tenant's (default) db"""
+    import polars as pl
+
+    if source and source.endswith(".parquet"):
+        return pl.read_parquet(source)
+    if source:
+        from sqlalchemy import create_engine
+
+        return pl.read_database("SELECT * FROM cars", connection=create_engine(source))
+
+    from models import get_engine
+
+    return pl.read_database("SELECT * FROM cars", connection=get_engine(tenant))
+
+
+def _simulate_chunk(task: tuple) -> pl.DataFrame:
+    """Process-pool entry point: simulate one slice of the fleet for one scenario"""
+    chunk, n_years, n_kilometer_per_year, backend, tax_tables = task
+    return simulate_costs_for_fleet(
+        chunk, n_years, n_kilometer_per_year, backend, tax_tables
+    )
+
+
+def iter_tasks(
+    df: pl.DataFrame,
+    years: list[int],
+    kms: list[int],
+    chunk_size: int,
+    backend: str | None = None,
+    tax_tables: TaxTables | None = None,
+):
+    """Yield _simulate_chunk tasks for every scenario and fleet slice"""
+    for n_years, n_kilometer_per_year in itertools.product(years, kms):
+        for offset in range(0, df.height, chunk_size):
+            chunk = df.slice(offset, chunk_size)
+            yield chunk, n_years, n_kilometer_per_year, backend, tax_tables
+
+
+def write_chunk(df: pl.DataFrame, out: Path, index: int) -> None:
+    """Write one result chunk: a Parquet part file, or rows appended to a CSV"""
+    import polars as pl
+
+    if out.suffix == ".csv":
+        # CSV has no list type, so emit one row per car per month
+        long_df = df.with_columns(
+            pl.int_ranges(1, pl.col("total_costs_over_time").list.len() + 1).alias(
+                "month"
+            )
+        ).explode(["total_costs_over_time", "month"])
+        with out.open("a" if index else "w", newline="") as f:
+            long_df.write_csv(f, include_header=index == 0)
+    else:
+        out.mkdir(parents=True, exist_ok=True)
+        df.write_parquet(out / f"part-{index:05d}.parquet")
+
+
+def run_simulate(args: argparse.Namespace) -> int:
+    if not (args.out or args.store):
+        raise SystemExit("simulate: give --out, --store or both")
+    df = load_fleet(args.fleet, args.tenant)
+    tax_tables = None
+    if args.tax_rules:
+        from tax_rules import compile_tax_rules, load_tax_rules
+
+        tax_tables = compile_tax_rules(
+            load_tax_rules(args.tax_rules, args.tax_rules_version)
+        )
+    tasks = iter_tasks(
+        df, args.years, args.km, args.chunk_size, args.backend, tax_tables
+    )
+    n_tasks = len(args.years) * len(args.km) * -(-df.height // args.chunk_size)
+    out = Path(args.out) if args.out else None
+    store = None
+    if args.store:
+        from result_store import ResultStore
+
+        store = ResultStore.create(args.store, df["id"], df["name"])
+
+    def write_results(results) -> None:
+        for index, result in enumerate(results):
+            if out is not None:
+                write_chunk(result, out, index)
+            if store is not None:
+                store.write(result)
+        if store is not None:
+            store.flush()
+
+    if args.workers <= 1 or n_tasks <= 1:
+        write_results(map(_simulate_chunk, tasks))
+    else:
+        # Polars' thread pool does not survive fork(); spawned children are cheap
+        # because the calculation layer imports lazily
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=spawn) as pool:
+            # map() keeps input order, so chunks are written as soon as they are ready
+            write_results(pool.map(_simulate_chunk, tasks))
+
+    targets = " and ".join(str(target) for target in (out, args.store) if target)
+    print(
+        f"Wrote {n_tasks} chunk(s) for {df.height} cars to {targets}", file=sys.stderr
+    )
+    return 0
+
+
+def run_calibrate(args: argparse.Namespace) -> int:
+    from calibration import fit_depreciation, scan_listings
+
+    fits = fit_depreciation(
+        scan_listings(args.listings), min_listings=args.min_listings
+    )
+    if args.out:
+        fits.write_csv(args.out)
+    else:
+        print(fits)
+
+    if args.write:
+        from db.operations import bulk_update_depreciation
+
+        updated = bulk_update_depreciation(
+            dict(zip(fits["model"], fits["depreciation_k"])), args.tenant
+        )
+        print(f"Updated depreciation_k on {updated} car(s)", file=sys.stderr)
+    return 0
+
+
+def run_migrate(args: argparse.Namespace) -> int:
+    from db.tenants import migrate_all
+
+    migrated = migrate_all(args.tenants, args.workers)
+    print(f"Migrated {len(migrated)} tenant database(s)", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Batch fleet cost reports")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    simulate = subparsers.add_parser(
+        "simulate", help="Simulate fleet costs for one or more scenarios"
+    )
+    simulate.add_argument(
+        "--fleet",
+        help="Parquet file or database URL (defaults to the app's SQLite db)",
+    )
+    simulate.add_argument("--tenant", help="Read the fleet from this tenant's db")
+    simulate.add_argument("--years", type=int, nargs="+", default=[5])
+    simulate.add_argument("--km", type=int, nargs="+", default=[15000])
+    simulate.add_argument(
+        "--out",
+        help="Output .csv file, or a directory of Parquet part files",
+    )
+    simulate.add_argument(
+        "--store",
+        help="Directory for a memory-mapped result store (see result_store.py)",
+    )
+    simulate.add_argument("--chunk-size", type=int, default=10000)
+    simulate.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    simulate.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        help="Cost engine (default: CAR_COST_BACKEND or numpy)",
+    )
+    simulate.add_argument(
+        "--tax-rules", help="Rule table for time-varying road tax (see tax_rules.py)"
+    )
+    simulate.add_argument(
+        "--tax-rules-version", help="Rule table version (default: latest)"
+    )
+    simulate.set_defaults(func=run_simulate)
+
+    calibrate = subparsers.add_parser(
+        "calibrate", help="Fit depreciation_k per model from resale listings"
+    )
+    calibrate.add_argument(
+        "--listings",
+        required=True,
+        help="CSV or Parquet with model, age_months, price, purchase_price",
+    )
+    calibrate.add_argument("--min-listings", type=int, default=20)
+    calibrate.add_argument("--out", help="Write the fitted values to this CSV")
+    calibrate.add_argument(
+        "--write",
+        action="store_true",
+        help="Store the fitted values on cars whose name matches the model",
+    )
+    calibrate.add_argument("--tenant", help="With --write, update this tenant's db")
+    calibrate.set_defaults(func=run_calibrate)
+
+    migrate = subparsers.add_parser(
+        "migrate", help="Upgrade tenant databases to the latest schema, in parallel"
+    )
+    migrate.add_argument(
+        "--tenants", nargs="+", help="Tenants to create or upgrade (default: all)"
+    )
+    migrate.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    migrate.set_defaults(func=run_migrate)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,19 @@
+from __future__ import annotations
+
 import math
-import numpy as np
-import polars as pl
+from typing import TYPE_CHECKING
+
+# NumPy and Polars are imported inside the functions that need them, so that
+# importing this module stays cheap for CLI and process-pool workers.
+if TYPE_CHECKING:
+    import numpy as np
+    import polars as pl
+
+    from fleet import FleetArrays
+    from tax_rules import TaxTables
 
 def depreciate_value(purchase_price, month, decay_rate, residual_percentage):
-    """Value and monthly depreciation using exponential decay: \( v(t) = p e^{-k t} \), steeper for new cars."""
+    r"""Value and monthly depreciation using exponential decay: \( v(t) = p e^{-k t} \), steeper for new cars."""
     k = decay_rate
     
     t = (month - 0.5) / 12.0  # Mid-month time for approximation
@@ -19,6 +29,8 @@ def depreciate_value(purchase_price, month, decay_rate, residual_percentage):
     return value, monthly_depr
 
 def cost_over_time(row: dict, n_years: int, n_kilometer_per_year: int) -> np.ndarray:
+    import numpy as np
+
     n_months = n_years * 12
     costs = np.zeros(n_months)
 
@@ -34,27 +46,47 @@ def cost_over_time(row: dict, n_years: int, n_kilometer_per_year: int) -> np.nda
 
     return costs
 
+def fleet_cost_matrix(
+    fleet: FleetArrays, n_years: int, n_kilometer_per_year: int, backend: str | None = None, tax_tables: TaxTables | None = None
+) -> np.ndarray:
+    """Cumulative costs for the whole fleet as a (cars, months) array.
+
+    Buy cars follow the same model as `cost_over_time`, vectorized across cars
+    and keeping the per-step rounding of the cumulative sum. Cars with type
+    "lease" and a monthly_lease follow the personal lease model from
+    `scenarios`. `backend` picks
+    the implementation (see kernels.py); defaults to CAR_COST_BACKEND or numpy.
+    With `tax_tables` (see tax_rules.py), buy cars pay rule-based road tax
+    from their buy month instead of the flat road_taxes_yearly.
+    """
+    from kernels import get_backend
+
+    road_tax = None
+    if tax_tables is not None:
+        from tax_rules import road_tax_monthly
+
+        road_tax = road_tax_monthly(tax_tables, fleet, n_years * 12)
+    return get_backend(backend)(fleet, n_years, n_kilometer_per_year, road_tax)
+
 def simulate_costs_for_fleet(
-    df: pl.DataFrame, n_years: int, n_kilometer_per_year: int
+    df: pl.DataFrame, n_years: int, n_kilometer_per_year: int, backend: str | None = None, tax_tables: TaxTables | None = None
 ) -> pl.DataFrame:
-    rows_out = []
-
-    for row in df.iter_rows(named=True):  # row is dict-like [web:14]
-        car_costs = cost_over_time(row, n_years, n_kilometer_per_year)
-
-        rows_out.append(
-            {
-                "id": row["id"],
-                "name": row["name"],
-                "type": row["type"],
-                "build_year_month": str(row["build_year"]) + str(row["build_month"]),
-                "n_years": n_years,
-                "n_kilometer_per_year": n_kilometer_per_year,
-                "total_costs_over_time": car_costs.tolist(),  # List[float] column [web:56]
-                "final_cost": float(car_costs[-1]),
-            }
-        )
-
-    # convert list-of-dicts to DataFrame
-    result_df = pl.from_dicts(rows_out)  # one row per car, list column for time series [web:39]
-    return result_df
\ No newline at end of file
+    import polars as pl
+
+    from fleet import FleetArrays
+
+    costs = fleet_cost_matrix(FleetArrays.from_polars(df), n_years, n_kilometer_per_year, backend, tax_tables)
+
+    # one row per car, list column for time series [web:39]
+    result_df = df.select(
+        "id",
+        "name",
+        "type",
+        pl.concat_str(pl.col("build_year").cast(pl.String), pl.col("build_month").cast(pl.String)).alias("build_year_month"),
+        pl.lit(n_years, dtype=pl.Int64).alias("n_years"),
+        pl.lit(n_kilometer_per_year, dtype=pl.Int64).alias("n_kilometer_per_year"),
+    ).with_columns(
+        pl.Series("total_costs_over_time", costs).cast(pl.List(pl.Float64)),
+        pl.Series("final_cost", costs[:, -1]),
+    )
+    return result_df
@@ -1,18 +1,20 @@
 # db/operations.py
-from sqlalchemy import create_engine
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
-from models import Car
+from typing import TYPE_CHECKING
+from models import Car, CarChange, get_engine
 
-import polars as pl
+if TYPE_CHECKING:
+    import polars as pl
+    from fleet import CarRecord, FleetArrays
 
-engine = create_engine('sqlite:///./db/cars.db')
-SessionLocal = sessionmaker(bind=engine)
+SessionLocal = sessionmaker()
 
 @contextmanager
-def get_session():
-    """Context manager for database sessions"""
-    session = SessionLocal()
+def get_session(tenant: str | None = None):
+    """Context manager for database sessions (on a tenant's database if given)"""
+    session = SessionLocal(bind=get_engine(tenant))
     try:
         yield session
         session.commit()
@@ -22,29 +24,47 @@ def get_session():
     finally:
         session.close()
 
+def _row_data(row) -> dict:
+    """Plain dict of a car's columns, from an ORM object or a result row"""
+    return {column.name: getattr(row, column.name) for column in Car.__table__.columns}
+
+def _log_changes(session, operation: str, rows) -> None:
+    """Append one change per row; runs in the caller's transaction"""
+    changes = [
+        {
+            "car_id": row.id,
+            "operation": operation,
+            "data": None if operation == "delete" else _row_data(row),
+        }
+        for row in rows
+    ]
+    if changes:
+        session.execute(insert(CarChange), changes)
+
 # CREATE
-def create_car(car_data: dict) -> Car:
+def create_car(car_data: dict, tenant: str | None = None) -> Car:
     """Add a new car to the database"""
-    with get_session() as session:
+    with get_session(tenant) as session:
         car = Car(**car_data)
         session.add(car)
         session.flush()  # Get the ID before committing
+        _log_changes(session, "insert", [car])
         return car
 
 # READ
-def get_car(car_id: int) -> Car | None:
+def get_car(car_id: int, tenant: str | None = None) -> Car | None:
     """Get a car by ID"""
-    with get_session() as session:
+    with get_session(tenant) as session:
         return session.query(Car).filter(Car.id == car_id).first()
 
-def get_all_cars() -> list[Car]:
+def get_all_cars(tenant: str | None = None) -> list[Car]:
     """Get all cars"""
-    with get_session() as session:
+    with get_session(tenant) as session:
         return session.query(Car).all()
 
-def search_cars(name: str = None, type: str = None) -> list[Car]:
+def search_cars(name: str = None, type: str = None, tenant: str | None = None) -> list[Car]:
     """Search cars with optional filters"""
-    with get_session() as session:
+    with get_session(tenant) as session:
         query = session.query(Car)
         if name:
             query = query.filter(Car.name.like(f'%{name}%'))
@@ -52,10 +72,33 @@ def search_cars(name: str = None, type: str = None) -> list[Car]:
             query = query.filter(Car.type == type)
         return query.all()
 
+def get_fleet_arrays(
+    name: str = None, type: str = None, tenant: str | None = None
+) -> "FleetArrays":
+    """Search cars like search_cars, but return a compact FleetArrays (no ORM objects)"""
+    import polars as pl
+    from fleet import FleetArrays
+
+    query = select(Car.__table__)
+    if name:
+        query = query.where(Car.name.like(f'%{name}%'))
+    if type:
+        query = query.where(Car.type == type)
+    with get_engine(tenant).connect() as connection:
+        return FleetArrays.from_polars(pl.read_database(query, connection=connection))
+
+def get_car_record(car_id: int, tenant: str | None = None) -> "CarRecord | None":
+    """Get a car by ID as a frozen CarRecord"""
+    from fleet import CarRecord
+
+    with get_engine(tenant).connect() as connection:
+        row = connection.execute(Car.__table__.select().where(Car.id == car_id)).first()
+    return CarRecord(**row._mapping) if row else None
+
 # UPDATE
-def update_car(car_id: int, updates: dict) -> Car:
+def update_car(car_id: int, updates: dict, tenant: str | None = None) -> Car:
     """Update a car's fields"""
-    with get_session() as session:
+    with get_session(tenant) as session:
         car = session.query(Car).filter(Car.id == car_id).first()
         if not car:
             raise ValueError(f"Car {car_id} not found")
@@ -64,23 +107,103 @@ def update_car(car_id: int, updates: dict) -> Car:
             setattr(car, key, value)
         
         session.flush()
+        _log_changes(session, "update", [car])
         return car
 
+def bulk_update_depreciation(
+    k_by_name: dict[str, float], tenant: str | None = None
+) -> int:
+    """Set depreciation_k for every car whose name matches; returns rows updated"""
+    from sqlalchemy import bindparam, update
+
+    if not k_by_name:
+        return 0
+    cars = Car.__table__
+    statement = (
+        update(cars)
+        .where(cars.c.name == bindparam("b_name"))
+        .values(depreciation_k=bindparam("b_k"))
+    )
+    params = [{"b_name": name, "b_k": k} for name, k in k_by_name.items()]
+    with get_session(tenant) as session:
+        updated = session.connection().execute(statement, params).rowcount
+        changed = session.execute(select(cars).where(cars.c.name.in_(list(k_by_name))))
+        _log_changes(session, "update", changed)
+        return updated
+
 # DELETE
-def delete_car(car_id: int) -> bool:
+def delete_car(car_id: int, tenant: str | None = None) -> bool:
     """Delete a car"""
-    with get_session() as session:
+    with get_session(tenant) as session:
         car = session.query(Car).filter(Car.id == car_id).first()
         if not car:
             return False
         session.delete(car)
+        _log_changes(session, "delete", [car])
         return True
 
+# HISTORY
+def get_fleet_revision(tenant: str | None = None) -> int:
+    """Revision of the fleet: the number of the last logged change (0 if none)"""
+    with get_engine(tenant).connect() as connection:
+        return connection.execute(
+            select(func.coalesce(func.max(CarChange.revision), 0))
+        ).scalar_one()
+
+def get_fleet_token(tenant: str | None = None) -> str:
+    """Change marker used to key caches; moves with every write made through this module"""
+    return f"rev-{get_fleet_revision(tenant)}"
+
+def changes_since(revision: int, tenant: str | None = None) -> list[dict]:
+    """Changes after `revision`, oldest first; data is the full row (None for deletes)"""
+    query = (
+        select(CarChange.__table__)
+        .where(CarChange.revision > revision)
+        .order_by(CarChange.revision)
+    )
+    with get_engine(tenant).connect() as connection:
+        return [dict(row) for row in connection.execute(query).mappings()]
+
+def fleet_at_revision(revision: int, tenant: str | None = None) -> "pl.DataFrame":
+    """The cars table as it was at `revision`, replayed from the change log"""
+    import polars as pl
+
+    changes = CarChange.__table__
+    latest = (
+        select(func.max(changes.c.revision).label("revision"))
+        .where(changes.c.revision <= revision)
+        .group_by(changes.c.car_id)
+        .subquery()
+    )
+    query = (
+        select(changes.c.data)
+        .join(latest, changes.c.revision == latest.c.revision)
+        .where(changes.c.operation != "delete")
+        .order_by(changes.c.car_id)
+    )
+    with get_engine(tenant).connect() as connection:
+        rows = connection.execute(query).scalars().all()
+    schema = {
+        column.name: {int: pl.Int64, float: pl.Float64, bool: pl.Boolean}.get(
+            column.type.python_type, pl.String
+        )
+        for column in Car.__table__.columns
+    }
+    # Rows logged before a column was added read it as null
+    return pl.DataFrame(
+        [{name: row.get(name) for name in schema} for row in rows], schema=schema
+    )
+
 # BULK OPERATIONS (for efficiency)
-def bulk_create_cars(cars_data: list[dict]) -> None:
+def bulk_create_cars(cars_data: list[dict], tenant: str | None = None) -> None:
     """Efficiently create multiple cars"""
-    with get_session() as session:
-        session.bulk_insert_mappings(Car, cars_data)
+    if not cars_data:
+        return
+    cars = Car.__table__
+    with get_session(tenant) as session:
+        # One multi-row INSERT ... RETURNING, so the log gets the generated ids
+        rows = session.execute(insert(cars).returning(*cars.c), cars_data).all()
+        _log_changes(session, "insert", rows)
 
 if __name__ == "__main__":
     """
@@ -0,0 +1,152 @@
+# db/tenants.py
+"""Per-tenant databases: one SQLite file per tenant, engines opened on demand.
+
+Each tenant's cars live in their own file (TENANT_DATABASE_URL with the tenant
+name filled in), so writes from different tenants never wait on the same
+SQLite lock. Engines are kept in a small LRU; the least recently used one is
+disposed when more than TENANT_ENGINE_CACHE_SIZE are open.
+
+The default tenant (None) is the app's own DATABASE_URL.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+TENANT_DATABASE_URL = os.getenv(
+    "TENANT_DATABASE_URL", "sqlite:///./db/tenants/{tenant}.db"
+)
+ENGINE_CACHE_SIZE = int(os.getenv("TENANT_ENGINE_CACHE_SIZE", "64"))
+
+_TENANT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+_engines: OrderedDict[str, Engine] = OrderedDict()
+_lock = threading.Lock()
+
+
+def tenant_url(tenant: str) -> str:
+    """Database URL of a tenant; raises ValueError for names unsafe in a path"""
+    if not _TENANT_NAME.fullmatch(tenant):
+        raise ValueError(f"Invalid tenant name {tenant!r}")
+    return TENANT_DATABASE_URL.format(tenant=tenant)
+
+
+def _sqlite_path(url: str) -> Path | None:
+    from sqlalchemy.engine import make_url
+
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or not url.database:
+        return None
+    return Path(url.database)
+
+
+def list_tenants() -> list[str]:
+    """Tenants with a database file (SQLite shards only)"""
+    pattern = _sqlite_path(TENANT_DATABASE_URL.format(tenant="*"))
+    if pattern is None:
+        return []
+    prefix, suffix = pattern.name.split("*")
+    return sorted(
+        path.name[len(prefix) : len(path.name) - len(suffix)]
+        for path in pattern.parent.glob(pattern.name)
+    )
+
+
+def _create_engine(url: str) -> Engine:
+    from sqlalchemy import create_engine, event
+
+    engine = create_engine(url, connect_args={"timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _):
+        # WAL: readers of a tenant don't block its writer, and commits are cheaper
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+
+def get_tenant_engine(tenant: str) -> Engine:
+    """Engine for a tenant's database; raises LookupError if it was never created"""
+    with _lock:
+        engine = _engines.get(tenant)
+        if engine is not None:
+            _engines.move_to_end(tenant)
+            return engine
+
+        url = tenant_url(tenant)
+        path = _sqlite_path(url)
+        # Connecting would silently create an empty file for a mistyped tenant
+        if path is not None and not path.exists():
+            raise LookupError(f"Tenant {tenant!r} has no database; see create_tenant()")
+        engine = _engines[tenant] = _create_engine(url)
+        while len(_engines) > ENGINE_CACHE_SIZE:
+            _, evicted = _engines.popitem(last=False)
+            evicted.dispose()
+        return engine
+
+
+def migrate_tenant(tenant: str, revision: str = "head") -> str:
+    """Bring one tenant's database to `revision`; returns the tenant.
+
+    An existing shard runs the Alembic migrations. A new one is created from
+    the models and stamped at head instead: the migration chain also seeds the
+    app's demo cars, which must not end up in customers' fleets.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, inspect
+
+    from models import Base
+
+    url = tenant_url(tenant)
+    path = _sqlite_path(url)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    config = Config(str(Path(__file__).resolve().parent.parent / "alembic.ini"))
+    config.attributes["url"] = url  # Read by alembic/env.py
+
+    engine = create_engine(url)
+    try:
+        is_new = not inspect(engine).has_table("alembic_version")
+        if is_new:
+            Base.metadata.create_all(engine)
+    finally:
+        engine.dispose()
+    if is_new:
+        command.stamp(config, "head")
+    else:
+        command.upgrade(config, revision)
+    return tenant
+
+
+def create_tenant(tenant: str) -> Engine:
+    """Create (or upgrade) a tenant's database, empty if new, and return its engine"""
+    migrate_tenant(tenant)
+    return get_tenant_engine(tenant)
+
+
+def migrate_all(
+    tenants: list[str] | None = None, workers: int | None = None
+) -> list[str]:
+    """Migrate every tenant's database (all known if None), shards in parallel"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    tenants = list_tenants() if tenants is None else tenants
+    if not tenants:
+        return []
+    # Alembic's migration context is process-global, so each shard runs in a
+    # worker process; spawn, because Polars' threads do not survive fork()
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+        return list(pool.map(migrate_tenant, tenants))
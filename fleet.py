@@ -0,0 +1,165 @@
+# fleet.py
+"""Compact read model for cost computations.
+
+`CarRecord` is an immutable, slotted stand-in for a single `models.Car` row;
+`FleetArrays` holds a whole fleet column-wise (one contiguous array per
+`Car` column) and is what the cost engine consumes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import polars as pl
+    import pyarrow as pa
+
+INT_COLUMNS = ("id", "build_year", "build_month", "buy_year", "buy_month")
+FLOAT_COLUMNS = (
+    "purchase_cost",
+    "road_taxes_yearly",
+    "insurance_monthly",
+    "fuel_per_km",
+    "depreciation_k",
+    "monthly_lease",
+)
+BOOL_COLUMNS = ("is_ev",)
+STR_COLUMNS = ("name", "type")
+# Columns added after the first revision; older frames (e.g. Parquet exports)
+# may not have them
+OPTIONAL_DEFAULTS = {"monthly_lease": None, "is_ev": False}
+
+
+@dataclass(frozen=True, slots=True)
+class CarRecord:
+    id: int
+    name: str
+    type: str | None
+    build_year: int
+    build_month: int
+    buy_year: int
+    buy_month: int
+    purchase_cost: float
+    road_taxes_yearly: float
+    insurance_monthly: float
+    fuel_per_km: float
+    depreciation_k: float
+    monthly_lease: float | None = None
+    is_ev: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class FleetArrays:
+    """Struct-of-arrays fleet: int32 ids/dates, float64 money and rates, bool flags"""
+
+    id: np.ndarray
+    name: np.ndarray
+    type: np.ndarray
+    build_year: np.ndarray
+    build_month: np.ndarray
+    buy_year: np.ndarray
+    buy_month: np.ndarray
+    purchase_cost: np.ndarray
+    road_taxes_yearly: np.ndarray
+    insurance_monthly: np.ndarray
+    fuel_per_km: np.ndarray
+    depreciation_k: np.ndarray
+    monthly_lease: np.ndarray
+    is_ev: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns"""
+        return sum(
+            getattr(self, c).nbytes for c in INT_COLUMNS + FLOAT_COLUMNS + BOOL_COLUMNS
+        )
+
+    @classmethod
+    def from_polars(cls, df: pl.DataFrame) -> FleetArrays:
+        """Build from a frame with the `cars` columns.
+
+        Float64 columns without nulls are viewed, not copied; nulls become NaN.
+        Integer columns are narrowed to int32 and must not contain nulls.
+        """
+        import polars as pl
+
+        missing = [c for c in INT_COLUMNS if df[c].null_count()]
+        if missing:
+            raise ValueError(f"Null values in integer column(s) {', '.join(missing)}")
+
+        df = df.with_columns(
+            pl.lit(default).alias(c)
+            for c, default in OPTIONAL_DEFAULTS.items()
+            if c not in df.columns
+        )
+        columns = {}
+        for c in FLOAT_COLUMNS:
+            columns[c] = df[c].to_numpy()
+            if columns[c].dtype != np.float64:
+                columns[c] = columns[c].astype(np.float64)
+        for c in INT_COLUMNS:
+            columns[c] = df[c].to_numpy().astype(np.int32, copy=False)
+        for c in BOOL_COLUMNS:
+            columns[c] = df[c].fill_null(False).cast(pl.Boolean).to_numpy()
+        for c in STR_COLUMNS:
+            columns[c] = df[c].to_numpy()
+        return cls(**columns)
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> FleetArrays:
+        """Build from an Arrow table, going through Polars' zero-copy import"""
+        import polars as pl
+
+        return cls.from_polars(pl.from_arrow(table))
+
+    @classmethod
+    def from_records(cls, records: list[CarRecord]) -> FleetArrays:
+        """Build from records; like from_polars, integer fields must not be None"""
+        missing = [
+            c for c in INT_COLUMNS if any(getattr(r, c) is None for r in records)
+        ]
+        if missing:
+            raise ValueError(f"Null values in integer column(s) {', '.join(missing)}")
+
+        columns = {}
+        for c in INT_COLUMNS:
+            columns[c] = np.fromiter(
+                (getattr(r, c) for r in records), np.int32, len(records)
+            )
+        for c in FLOAT_COLUMNS:
+            columns[c] = np.fromiter(
+                (np.nan if getattr(r, c) is None else getattr(r, c) for r in records),
+                np.float64,
+                len(records),
+            )
+        for c in BOOL_COLUMNS:
+            columns[c] = np.fromiter(
+                (bool(getattr(r, c)) for r in records), np.bool_, len(records)
+            )
+        for c in STR_COLUMNS:
+            columns[c] = np.array([getattr(r, c) for r in records], dtype=object)
+        return cls(**columns)
+
+    def record(self, index: int) -> CarRecord:
+        """Materialize one car as a `CarRecord`"""
+        values = {
+            f.name: getattr(self, f.name)[index : index + 1].tolist()[0]
+            for f in fields(CarRecord)
+        }
+        # NaN stands in for NULL in the arrays; records use None like the db
+        for c, default in OPTIONAL_DEFAULTS.items():
+            if default is None and values[c] != values[c]:
+                values[c] = None
+        return CarRecord(**values)
+
+    def take(self, indices) -> FleetArrays:
+        """Subset of the fleet, in the order of `indices`"""
+        return FleetArrays(
+            **{f.name: getattr(self, f.name)[indices] for f in fields(self)}
+        )
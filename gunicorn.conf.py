@@ -0,0 +1,9 @@
+# gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8050")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Load the app once in the master so workers fork with Dash already imported
+preload_app = True
+timeout = 60
@@ -0,0 +1,243 @@
+# kernels.py
+"""Interchangeable backends for the monthly cost recurrence.
+
+- "numpy":  vectorized across cars, loops over months (scenarios.py)
+- "numba":  compiled per-car recurrence, parallel across cars with prange;
+            falls back to the same kernel in plain Python if Numba is missing
+- "python": the kernel in plain Python, handy for debugging new cost rules
+
+Pick one per call (`backend=`) or per process (CAR_COST_BACKEND). Each backend
+is checked against the reference `cost_over_time` the first time it is used.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import warnings
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from fleet import FleetArrays
+
+BACKENDS = ("numpy", "numba", "python")
+DEFAULT_BACKEND = os.getenv("CAR_COST_BACKEND", "numpy")
+
+# Per-step cent rounding can flip on a 1-ulp difference in exp(), so a compiled
+# kernel may drift by a cent now and then; anything beyond that is a bug.
+VALIDATION_ATOL = 0.05
+
+_validated: dict[str, Callable] = {}
+
+
+def _make_cost_kernel(prange: Callable) -> Callable:
+    """The cost kernel with `prange` as its outer loop: numba.prange or range"""
+    import numpy as np
+
+    def _cost_kernel(
+        ongoing,
+        purchase_cost,
+        k,
+        age_at_start,
+        is_lease,
+        residual,
+        extra,
+        has_extra,
+        out,
+    ):
+        """Cumulative costs for every car, one car per (parallel) iteration.
+
+        Cars are independent, so the outer loop is a `prange` under Numba. Rules
+        that are not closed-form (floors, step changes) go in the inner loop.
+        `extra` holds per-month buy costs such as rule-based road tax.
+        """
+        n_cars, n_months = out.shape
+        for c in prange(n_cars):
+            previous = 0.0
+            for i in range(n_months):
+                monthly = ongoing[c]
+                if not is_lease[c]:
+                    if has_extra:
+                        monthly = monthly + extra[c, i]
+                    # Per element as in scenarios.depreciation_terms
+                    t = (age_at_start[c] + i - 0.5) / 12.0  # Mid-month
+                    value = max(purchase_cost[c] * math.exp(-k[c] * t), residual[c])
+                    monthly = monthly + (k[c] / 12.0) * value
+                previous = np.round(previous + monthly, 2)
+                out[c, i] = previous
+
+    return _cost_kernel
+
+
+_python_kernel: Callable | None = None
+_compiled_kernel: Callable | None = None
+
+
+def _load_python_kernel() -> Callable:
+    global _python_kernel
+    if _python_kernel is None:
+        _python_kernel = _make_cost_kernel(range)
+    return _python_kernel
+
+
+def _load_compiled_kernel() -> Callable:
+    """JIT the kernel on first use; cache=True reuses the build across processes"""
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        import numba
+
+        _compiled_kernel = numba.njit(parallel=True, cache=True)(
+            _make_cost_kernel(numba.prange)
+        )
+    return _compiled_kernel
+
+
+def _kernel_inputs(
+    fleet: FleetArrays, n_kilometer_per_year: int, road_tax: np.ndarray | None
+):
+    import numpy as np
+
+    from scenarios import (
+        age_at_start,
+        cash_ongoing_monthly,
+        lease_mask,
+        personal_lease_fee_monthly,
+        residual_value,
+    )
+
+    is_lease = lease_mask(fleet)
+    ongoing = np.where(
+        is_lease,
+        personal_lease_fee_monthly(fleet, n_kilometer_per_year),
+        cash_ongoing_monthly(
+            fleet, n_kilometer_per_year, include_road_tax=road_tax is None
+        ),
+    )
+    return (
+        np.ascontiguousarray(ongoing, dtype=np.float64),
+        fleet.purchase_cost,
+        fleet.depreciation_k,
+        age_at_start(fleet).astype(np.int64),
+        is_lease.astype(np.bool_),
+        residual_value(fleet),
+        np.zeros((1, 1)) if road_tax is None else np.ascontiguousarray(road_tax),
+        road_tax is not None,
+    )
+
+
+def numpy_cost_matrix(
+    fleet: FleetArrays,
+    n_years: int,
+    n_kilometer_per_year: int,
+    road_tax: np.ndarray | None = None,
+) -> np.ndarray:
+    from scenarios import accumulate, fleet_monthly_costs
+
+    return accumulate(
+        fleet_monthly_costs(fleet, n_years * 12, n_kilometer_per_year, road_tax)
+    )
+
+
+def python_cost_matrix(
+    fleet: FleetArrays,
+    n_years: int,
+    n_kilometer_per_year: int,
+    road_tax: np.ndarray | None = None,
+) -> np.ndarray:
+    import numpy as np
+
+    out = np.zeros((len(fleet), n_years * 12))
+    _load_python_kernel()(*_kernel_inputs(fleet, n_kilometer_per_year, road_tax), out)
+    return out
+
+
+def numba_cost_matrix(
+    fleet: FleetArrays,
+    n_years: int,
+    n_kilometer_per_year: int,
+    road_tax: np.ndarray | None = None,
+) -> np.ndarray:
+    try:
+        kernel = _load_compiled_kernel()
+    except ImportError:
+        warnings.warn("Numba is not installed; running the cost kernel in Python")
+        return python_cost_matrix(fleet, n_years, n_kilometer_per_year, road_tax)
+    import numpy as np
+
+    out = np.zeros((len(fleet), n_years * 12))
+    kernel(*_kernel_inputs(fleet, n_kilometer_per_year, road_tax), out)
+    return out
+
+
+_BACKEND_FUNCS = {
+    "numpy": numpy_cost_matrix,
+    "numba": numba_cost_matrix,
+    "python": python_cost_matrix,
+}
+
+
+def validation_fleet(n_cars: int = 32, seed: int = 0) -> FleetArrays:
+    """Small random buy-only fleet covering young, old and floored cars"""
+    import numpy as np
+
+    from fleet import FleetArrays
+
+    rng = np.random.default_rng(seed)
+    build_year = rng.integers(2005, 2026, n_cars, dtype=np.int32)
+    return FleetArrays(
+        id=np.arange(1, n_cars + 1, dtype=np.int32),
+        name=np.array([f"car_{i}" for i in range(n_cars)], dtype=object),
+        type=np.full(n_cars, "buy", dtype=object),
+        build_year=build_year,
+        build_month=rng.integers(1, 13, n_cars, dtype=np.int32),
+        buy_year=build_year + rng.integers(0, 8, n_cars, dtype=np.int32),
+        buy_month=rng.integers(1, 13, n_cars, dtype=np.int32),
+        purchase_cost=rng.uniform(3_000, 80_000, n_cars).round(0),
+        road_taxes_yearly=rng.uniform(0, 2_000, n_cars).round(0),
+        insurance_monthly=rng.uniform(40, 300, n_cars).round(0),
+        fuel_per_km=rng.uniform(0.03, 0.2, n_cars).round(2),
+        depreciation_k=rng.uniform(0.02, 0.3, n_cars).round(3),
+        monthly_lease=np.full(n_cars, np.nan),
+        is_ev=rng.random(n_cars) < 0.5,
+    )
+
+
+def reference_cost_matrix(
+    fleet: FleetArrays, n_years: int, n_kilometer_per_year: int
+) -> np.ndarray:
+    """The reference loop (`cost_over_time`), one car at a time"""
+    import numpy as np
+
+    from cost_calculator import cost_over_time
+
+    return np.vstack(
+        [
+            cost_over_time(asdict(fleet.record(i)), n_years, n_kilometer_per_year)
+            for i in range(len(fleet))
+        ]
+    )
+
+
+def get_backend(name: str | None = None) -> Callable:
+    """Resolve a backend by name, checking it against the reference on first use"""
+    name = name or DEFAULT_BACKEND
+    if name not in _BACKEND_FUNCS:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {BACKENDS}")
+    if name not in _validated:
+        import numpy as np
+
+        func = _BACKEND_FUNCS[name]
+        fleet = validation_fleet()
+        expected = reference_cost_matrix(fleet, 3, 15_000)
+        actual = func(fleet, 3, 15_000)
+        error = float(np.max(np.abs(actual - expected)))
+        if not error <= VALIDATION_ATOL:
+            raise RuntimeError(
+                f"Backend {name!r} deviates from cost_over_time by up to {error:.4f}"
+            )
+        _validated[name] = func
+    return _validated[name]
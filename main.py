@@ -1,15 +1,21 @@
-from dash import Dash, dcc, html, Input, Output, State
+from dash import Dash, dcc, html, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
+import numpy as np
 import polars as pl
-import plotly.express as px
 import dash_daq as daq
 
+from aggregation import cheapest, rank_fleet
+from api import api
+from cache import cached_frame, make_key
 from cost_calculator import simulate_costs_for_fleet
-from models import engine
-from db.operations import create_car
+from models import get_engine
+from db.operations import create_car, get_fleet_token
+from result_store import fleet_store
 
 # Initialize app with Bootstrap theme
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+server = app.server  # WSGI callable, see wsgi.py
+server.register_blueprint(api)  # JSON/Arrow cost queries under /api
 
 # Define color scheme
 COLORS = {
@@ -20,6 +26,9 @@ COLORS = {
     "text": "#03192F",
 }
 
+# Larger fleets only plot their cheapest cars at the horizon
+MAX_PLOTTED_CARS = 25
+
 # Custom styling for sliders
 slider_style = {
     "padding": "20px 10px",
@@ -143,6 +152,31 @@ form_card = dbc.Card(
                     ],
                     className="mb-3",
                 ),
+                dbc.Row(
+                    [
+                        dbc.Col(
+                            [
+                                dbc.Label("Monthly Lease (€, lease only)"),
+                                dbc.Input(
+                                    id="input-lease", type="number", placeholder="450"
+                                ),
+                            ],
+                            md=4,
+                        ),
+                        dbc.Col(
+                            [
+                                dbc.Checkbox(
+                                    id="input-ev",
+                                    label="Electric vehicle",
+                                    value=False,
+                                    className="mt-4",
+                                ),
+                            ],
+                            md=4,
+                        ),
+                    ],
+                    className="mb-3",
+                ),
                 dbc.Button(
                     "Add Car", id="btn-add-car", color="primary", className="mt-2"
                 ),
@@ -174,6 +208,8 @@ form_card = dbc.Card(
     State("buy-date", "value"),
     State("build-date", "value"),
     State("depreciation-k", "value"),
+    State("input-lease", "value"),
+    State("input-ev", "value"),
     prevent_initial_call=True,
 )
 def add_new_car(
@@ -187,6 +223,8 @@ def add_new_car(
     buy_date,
     build_date,
     depreciation_k,
+    monthly_lease,
+    is_ev,
 ):
     if not all([name, cost, tax, insurance, fuel]):
         return (
@@ -198,6 +236,13 @@ def add_new_car(
             None,
         )
 
+    if car_type == "lease" and not monthly_lease:
+        # Keep the form filled in so only the lease fee has to be added
+        return (
+            dbc.Alert("Please enter the monthly lease fee", color="warning"),
+            *[no_update] * 8,
+        )
+
     buy_date_split, build_date_split = (
         str(buy_date).split("-"),
         str(build_date).split("-"),
@@ -218,6 +263,8 @@ def add_new_car(
             "buy_year": buy_year,
             "buy_month": buy_month,
             "depreciation_k": float(depreciation_k),
+            "monthly_lease": float(monthly_lease) if monthly_lease else None,
+            "is_ev": bool(is_ev),
         }
 
         create_car(car_data)
@@ -396,13 +443,14 @@ app.layout = dbc.Container(
                                 dbc.CardBody(
                                     [
                                         html.H6(
-                                            "Tesla Model 3",
+                                            "Cheapest",
+                                            id="cheapest-1-name",
                                             className="text-muted mb-2",
                                             style={"fontSize": "13px"},
                                         ),
                                         html.H4(
                                             "—",
-                                            id="tesla-total",
+                                            id="cheapest-1-total",
                                             style={
                                                 "color": COLORS["primary"],
                                                 "fontWeight": "600",
@@ -429,13 +477,14 @@ app.layout = dbc.Container(
                                 dbc.CardBody(
                                     [
                                         html.H6(
-                                            "Opel Corsa-e",
+                                            "Runner-up",
+                                            id="cheapest-2-name",
                                             className="text-muted mb-2",
                                             style={"fontSize": "13px"},
                                         ),
                                         html.H4(
                                             "—",
-                                            id="opel-total",
+                                            id="cheapest-2-total",
                                             style={
                                                 "color": "#636EFA",
                                                 "fontWeight": "600",
@@ -472,8 +521,10 @@ app.layout = dbc.Container(
 @app.callback(
     [
         Output("cost-graph", "figure"),
-        Output("tesla-total", "children"),
-        Output("opel-total", "children"),
+        Output("cheapest-1-name", "children"),
+        Output("cheapest-1-total", "children"),
+        Output("cheapest-2-name", "children"),
+        Output("cheapest-2-total", "children"),
         Output("cumulative-toggle", "label"),
     ],
     [
@@ -483,12 +534,31 @@ app.layout = dbc.Container(
     ],
 )
 def update_dashboard(n_kilometers_per_year, n_years, is_cumulative):
-    # Vehicle data
-    # Read from SQLite using Polars
-    df_pl = pl.read_database("SELECT * FROM cars", connection=engine)
-    print(df_pl)
+    import plotly.express as px  # heavy; only needed once the graph is drawn
+
+    # Vehicle data, shared between workers through the result cache
+    fleet_token = get_fleet_token()
 
-    df_cost = simulate_costs_for_fleet(df_pl, n_years, n_kilometers_per_year)
+    def load_fleet():
+        # Read from SQLite using Polars
+        return cached_frame(
+            make_key("fleet", fleet_token),
+            lambda: pl.read_database("SELECT * FROM cars", connection=get_engine()),
+        )
+
+    # Simulations live in memory-mapped files shared by all workers
+    store = fleet_store(fleet_token, load_fleet)
+    if not store.has(n_years, n_kilometers_per_year):
+        store.write(
+            simulate_costs_for_fleet(load_fleet(), n_years, n_kilometers_per_year)
+        )
+        store.flush()
+    plotted = None
+    if len(store) > MAX_PLOTTED_CARS:
+        costs = store.matrix(n_years, n_kilometers_per_year)
+        plotted = np.asarray(store.index["car_ids"])[cheapest(costs, MAX_PLOTTED_CARS)]
+    # Only the plotted rows are read from the store
+    df_cost = store.frame(n_years, n_kilometers_per_year, plotted)
 
     # Explode for plotting
     exploded_df = df_cost.with_columns(
@@ -572,23 +642,18 @@ def update_dashboard(n_kilometers_per_year, n_years, is_cumulative):
         hovertemplate="<b>%{fullData.name}</b><br>Month: %{x}<br>Cost: €%{y:,.0f}<extra></extra>",
     )
 
-    # Get final costs (always from cumulative)
-    final_costs = df_cost.select(["name", "total_costs_over_time"]).to_dicts()
-    tesla_final = (
-        final_costs[0]["total_costs_over_time"][-1]
-        if final_costs[0]["name"] == "Tesla Model 3"
-        else final_costs[1]["total_costs_over_time"][-1]
-    )
-    opel_final = (
-        final_costs[1]["total_costs_over_time"][-1]
-        if final_costs[1]["name"] == "Opel Corsa-e"
-        else final_costs[0]["total_costs_over_time"][-1]
-    )
+    # Two cheapest cars at the horizon (always from cumulative)
+    # The plotted cars always include the cheapest ones
+    ranking = rank_fleet(df_cost, n=2).to_dicts()
+    ranking += [{"name": "—", "total_cost": None}] * (2 - len(ranking))
+    cards = []
+    for entry in ranking:
+        total = entry["total_cost"]
+        cards += [entry["name"], "—" if total is None else f"€{total:,.0f}"]
 
     return (
         fig,
-        f"€{tesla_final:,.0f}",
-        f"€{opel_final:,.0f}",
+        *cards,
         {"label": toggle_label, "style": {"fontSize": "14px"}},
     )
 
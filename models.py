@@ -1,8 +1,24 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Float, create_engine
+import os
+from functools import cache
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    String,
+    create_engine,
+    false,
+    func,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./db/cars.db")
+
 Base = declarative_base()
 
 
@@ -21,8 +37,47 @@ class Car(Base):
     insurance_monthly = Column(Float)
     fuel_per_km = Column(Float)
     depreciation_k = Column(Float)
+    monthly_lease = Column(Float)  # lease cars only
+    is_ev = Column(Boolean, nullable=False, default=False, server_default=false())
+
+
+class CarChange(Base):
+    """Append-only log of writes to cars; `revision` is the fleet revision it created"""
+
+    __tablename__ = "car_changes"
+    # AUTOINCREMENT: SQLite never reuses a revision number
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    revision = Column(Integer, primary_key=True)
+    car_id = Column(Integer, nullable=False, index=True)
+    operation = Column(String, nullable=False)  # insert, update or delete
+    data = Column(JSON)  # the full row after the change; None for deletes
+    changed_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+@cache
+def _default_engine():
+    return create_engine(DATABASE_URL)
+
+
+def get_engine(tenant: str | None = None):
+    """Create the engine on first use, so importing models has no side effects.
+
+    With a tenant, the engine of that tenant's own database (see db/tenants.py).
+    """
+    if tenant is None:
+        return _default_engine()
+    from db.tenants import get_tenant_engine
+
+    return get_tenant_engine(tenant)
+
+
+# Unbound; sessions get the engine at creation time: Session(bind=get_engine())
+Session = sessionmaker()
 
 
-# Create engine
-engine = create_engine("sqlite:///./db/cars.db")
-Session = sessionmaker(bind=engine)
+def __getattr__(name: str):
+    # Keep `from models import engine` working without an import-time engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
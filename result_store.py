@@ -0,0 +1,202 @@
+# result_store.py
+"""Memory-mapped store for simulated cost matrices.
+
+A store is a directory holding one fleet's results: a (cars, months) float64
+.npy file per scenario, rows in fleet order, and a small index.json:
+
+    {"car_ids": [...], "names": [...],
+     "scenarios": {"y5_km15000": {"file": "y5_km15000.npy", "n_years": 5,
+                                  "n_kilometer_per_year": 15000}}}
+
+Readers map the files with np.load(mmap_mode="r"), so worker processes share
+the OS page cache instead of each holding a copy, and reading a few rows only
+touches those rows' pages. Files are written under a temporary name and
+renamed into place, so a reader never sees a half-written matrix.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import polars as pl
+
+STORE_ROOT = os.getenv("RESULT_STORE_PATH", "./db/results")
+INDEX_FILE = "index.json"
+SUPERSEDED_FILE = "superseded"
+# Stores of older revisions outlive any request (gunicorn timeout) still reading them
+SUPERSEDED_GRACE_SECONDS = 600
+
+
+def scenario_key(n_years: int, n_kilometer_per_year: int) -> str:
+    return f"y{n_years}_km{n_kilometer_per_year}"
+
+
+class ResultStore:
+    """One fleet's simulated cost matrices, one memory-mapped file per scenario"""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._index: dict | None = None
+        self._row_of: dict[int, int] | None = None
+        self._maps: dict[str, np.ndarray] = {}
+        self._writers: dict[str, tuple[dict, Path, np.memmap]] = {}
+
+    @classmethod
+    def create(cls, root: str | Path, car_ids, names) -> ResultStore:
+        """Start an empty store for a fleet, replacing any index already there"""
+        store = cls(root)
+        store.root.mkdir(parents=True, exist_ok=True)
+        store._index = {
+            "car_ids": [int(car_id) for car_id in car_ids],
+            "names": [str(name) for name in names],
+            "scenarios": {},
+        }
+        store._save_index()
+        return store
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            self._index = json.loads((self.root / INDEX_FILE).read_text())
+        return self._index
+
+    def _save_index(self) -> None:
+        tmp = self.root / f"{INDEX_FILE}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(self.index))
+        os.replace(tmp, self.root / INDEX_FILE)
+
+    def __len__(self) -> int:
+        return len(self.index["car_ids"])
+
+    def rows_of(self, car_ids) -> np.ndarray:
+        """Row offsets of `car_ids`; raises KeyError for cars not in the store"""
+        if self._row_of is None:
+            self._row_of = {
+                car_id: row for row, car_id in enumerate(self.index["car_ids"])
+            }
+        return np.array(
+            [self._row_of[int(car_id)] for car_id in car_ids], dtype=np.intp
+        )
+
+    def _entry(self, n_years: int, n_kilometer_per_year: int) -> dict | None:
+        key = scenario_key(n_years, n_kilometer_per_year)
+        if key not in self.index["scenarios"]:
+            self._index = None  # Another process may have added it since
+        return self.index["scenarios"].get(key)
+
+    def has(self, n_years: int, n_kilometer_per_year: int) -> bool:
+        return self._entry(n_years, n_kilometer_per_year) is not None
+
+    # WRITE
+    def write(self, df_cost: pl.DataFrame) -> None:
+        """Put simulate_costs_for_fleet output for one scenario (any subset of cars)"""
+        from aggregation import cost_matrix
+
+        if df_cost.is_empty():
+            return
+        n_years = int(df_cost["n_years"][0])
+        n_kilometer_per_year = int(df_cost["n_kilometer_per_year"][0])
+        key = scenario_key(n_years, n_kilometer_per_year)
+        if key not in self._writers:
+            entry = {
+                "file": f"{key}.npy",
+                "n_years": n_years,
+                "n_kilometer_per_year": n_kilometer_per_year,
+            }
+            tmp = self.root / f"{entry['file']}.{os.getpid()}.tmp"
+            matrix = np.lib.format.open_memmap(
+                tmp, mode="w+", dtype=np.float64, shape=(len(self), n_years * 12)
+            )
+            self._writers[key] = entry, tmp, matrix
+        matrix = self._writers[key][2]
+        matrix[self.rows_of(df_cost["id"])] = cost_matrix(df_cost)
+
+    def flush(self) -> None:
+        """Move written scenarios into place and publish them in the index"""
+        if not self._writers:
+            return
+        for entry, tmp, matrix in self._writers.values():
+            matrix.flush()
+            os.replace(tmp, self.root / entry["file"])
+        # Merge into the index on disk: other processes may have added scenarios
+        self._index = None
+        for key, (entry, _, _) in self._writers.items():
+            self.index["scenarios"][key] = entry
+            self._maps.pop(key, None)
+        self._save_index()
+        self._writers.clear()
+
+    # READ
+    def matrix(self, n_years: int, n_kilometer_per_year: int) -> np.ndarray:
+        """Read-only (cars, months) memory map of a scenario; KeyError if not stored"""
+        key = scenario_key(n_years, n_kilometer_per_year)
+        if key not in self._maps:
+            entry = self._entry(n_years, n_kilometer_per_year)
+            if entry is None:
+                raise KeyError(f"Scenario {key} is not in {self.root}")
+            self._maps[key] = np.load(self.root / entry["file"], mmap_mode="r")
+        return self._maps[key]
+
+    def rows(self, n_years: int, n_kilometer_per_year: int, car_ids) -> np.ndarray:
+        """Costs of the given cars only, copied out of the memory map"""
+        return self.matrix(n_years, n_kilometer_per_year)[self.rows_of(car_ids)]
+
+    def frame(
+        self, n_years: int, n_kilometer_per_year: int, car_ids=None
+    ) -> pl.DataFrame:
+        """Given cars (all if None), as simulate_costs_for_fleet without type/build date"""
+        import polars as pl
+
+        if car_ids is None:
+            rows = np.arange(len(self))
+            costs = np.asarray(self.matrix(n_years, n_kilometer_per_year))
+        else:
+            rows = self.rows_of(car_ids)
+            costs = self.matrix(n_years, n_kilometer_per_year)[rows]
+        return pl.DataFrame(
+            {
+                "id": np.asarray(self.index["car_ids"])[rows],
+                "name": np.asarray(self.index["names"], dtype=object)[rows],
+                "n_years": np.full(len(rows), n_years),
+                "n_kilometer_per_year": np.full(len(rows), n_kilometer_per_year),
+                "total_costs_over_time": pl.Series(costs).cast(pl.List(pl.Float64)),
+                "final_cost": costs[:, -1],
+            }
+        )
+
+
+def fleet_store(
+    fleet_token: str, load_fleet: Callable[[], pl.DataFrame], root: str = STORE_ROOT
+) -> ResultStore:
+    """The store for one fleet revision under `root`, created on first use.
+
+    Creating a store marks the other revisions' stores as superseded; they are
+    removed SUPERSEDED_GRACE_SECONDS later, so a worker that resolved an older
+    revision just before can still finish reading it.
+    """
+    path = Path(root) / fleet_token
+    if (path / INDEX_FILE).exists():
+        return ResultStore(path)
+    now = time.time()
+    for other in Path(root).glob("*"):
+        if not other.is_dir() or other == path:
+            continue
+        marker = other / SUPERSEDED_FILE
+        try:
+            if not marker.exists():
+                marker.touch()
+            elif now - marker.stat().st_mtime > SUPERSEDED_GRACE_SECONDS:
+                shutil.rmtree(other, ignore_errors=True)
+        except FileNotFoundError:
+            pass  # Removed by another worker meanwhile
+    fleet = load_fleet()
+    return ResultStore.create(path, fleet["id"], fleet["name"])
@@ -0,0 +1,289 @@
+# scenarios.py
+"""Batched lease-vs-buy scenario engine.
+
+Vectorized successor of archive/cost_funcs.py: business lease (bijtelling),
+personal lease and cash purchase are computed for the whole fleet, every
+month of the horizon and any number of km/year levels in one call.
+
+Monthly arrays have shape (cars, months), or (km levels, cars, months) when
+several km/year values are passed.
+"""
+
+from __future__ import annotations
+
+import warnings
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from fleet import FleetArrays
+    from tax_rules import TaxTables
+
+OWNERSHIP_TYPES = ("buy", "personal_lease", "business_lease")
+OPPORTUNITY_RATE = 0.06
+RESIDUAL_PERCENTAGE = 0.2
+
+
+@dataclass(frozen=True)
+class LeaseTerms:
+    """Business lease parameters shared by the whole fleet"""
+
+    mobility_budget_gross_monthly: float = 0.0
+    tax_rate_on_bijtelling: float = 0.37
+    bijtelling_rate_ev_low: float = 0.16
+    bijtelling_rate_standard: float = 0.22
+    ev_threshold: float = 30000.0
+
+
+def _km_levels(n_kilometer_per_year: int | Sequence[int]) -> np.ndarray:
+    """Scalar km stays 0-d; a sequence becomes a (km levels, 1) column"""
+    km = np.asarray(n_kilometer_per_year, dtype=np.float64)
+    return km if km.ndim == 0 else km[:, None]
+
+
+def accumulate(monthly: np.ndarray) -> np.ndarray:
+    """Cumulative costs along the last axis, rounded to cents at every step"""
+    costs = np.empty_like(monthly)
+    previous = np.zeros(monthly.shape[:-1])
+    for i in range(monthly.shape[-1]):
+        previous = np.round(previous + monthly[..., i], decimals=2)
+        costs[..., i] = previous
+    return costs
+
+
+def age_at_start(fleet: FleetArrays) -> np.ndarray:
+    """Age in months of each car during its first simulated month"""
+    return (fleet.buy_year * 12 + fleet.buy_month + 1) - (
+        fleet.build_year * 12 + fleet.build_month
+    )
+
+
+def residual_value(fleet: FleetArrays) -> np.ndarray:
+    """Value each car never depreciates below"""
+    return fleet.purchase_cost * RESIDUAL_PERCENTAGE
+
+
+def depreciation_terms(
+    fleet: FleetArrays, n_months: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Terms of the floored decay, value = max(decayed, residual).
+
+    t is the mid-month age in years and decayed = p * exp(-k t), both (cars,
+    months); residual is the (cars, 1) floor.
+    """
+    t = ((age_at_start(fleet)[:, None] + np.arange(n_months)) - 0.5) / 12.0
+    decayed = fleet.purchase_cost[:, None] * np.exp(-fleet.depreciation_k[:, None] * t)
+    return t, decayed, residual_value(fleet)[:, None]
+
+
+def depreciation_monthly(fleet: FleetArrays, n_months: int) -> np.ndarray:
+    """Monthly value loss per car: exponential decay floored at the residual value"""
+    _, decayed, residual = depreciation_terms(fleet, n_months)
+    return (fleet.depreciation_k[:, None] / 12.0) * np.maximum(decayed, residual)
+
+
+def cash_ongoing_monthly(
+    fleet: FleetArrays,
+    n_kilometer_per_year: int | Sequence[int],
+    include_road_tax: bool = True,
+) -> np.ndarray:
+    """Month-independent part of owning: tax, insurance, fuel, opportunity cost"""
+    km = _km_levels(n_kilometer_per_year)
+    if include_road_tax:
+        # Same summation order as cost_over_time, so results match it bit for bit
+        return (
+            (fleet.road_taxes_yearly / 12)
+            + fleet.insurance_monthly
+            + (km / 12 * fleet.fuel_per_km)
+            + (fleet.purchase_cost * OPPORTUNITY_RATE * (1 / 12))
+        )
+    return (
+        fleet.insurance_monthly
+        + (km / 12 * fleet.fuel_per_km)
+        + (fleet.purchase_cost * OPPORTUNITY_RATE * (1 / 12))
+    )
+
+
+def lease_mask(fleet: FleetArrays) -> np.ndarray:
+    """Cars costed as a personal lease: type "lease" with a monthly_lease fee.
+
+    A lease car without a fee is costed as a purchase, as before lease pricing
+    existed, instead of turning every month into NaN.
+    """
+    is_lease = fleet.type == "lease"
+    missing_fee = is_lease & np.isnan(fleet.monthly_lease)
+    if missing_fee.any():
+        warnings.warn(
+            f"{int(missing_fee.sum())} lease car(s) have no monthly_lease; "
+            "costing them as purchases"
+        )
+    return is_lease & ~missing_fee
+
+
+def personal_lease_fee_monthly(
+    fleet: FleetArrays, n_kilometer_per_year: int | Sequence[int]
+) -> np.ndarray:
+    """Lease fee (includes tax and insurance) plus fuel, which is not bundled"""
+    km = _km_levels(n_kilometer_per_year)
+    return fleet.monthly_lease + (km / 12 * fleet.fuel_per_km)
+
+
+def cash_purchase_monthly(
+    fleet: FleetArrays,
+    n_months: int,
+    n_kilometer_per_year: int | Sequence[int],
+    road_tax: np.ndarray | None = None,
+) -> np.ndarray:
+    """Ongoing costs plus depreciation.
+
+    `road_tax` is an optional (cars, months) monthly road tax (see tax_rules.py)
+    that replaces the flat road_taxes_yearly / 12.
+    """
+    if road_tax is None:
+        ongoing = cash_ongoing_monthly(fleet, n_kilometer_per_year)
+        return ongoing[..., None] + depreciation_monthly(fleet, n_months)
+    ongoing = cash_ongoing_monthly(fleet, n_kilometer_per_year, include_road_tax=False)
+    return (ongoing[..., None] + road_tax) + depreciation_monthly(fleet, n_months)
+
+
+def personal_lease_monthly(
+    fleet: FleetArrays, n_months: int, n_kilometer_per_year: int | Sequence[int]
+) -> np.ndarray:
+    """Personal lease fee plus fuel, constant over the horizon"""
+    monthly = personal_lease_fee_monthly(fleet, n_kilometer_per_year)
+    return np.broadcast_to(monthly[..., None], monthly.shape + (n_months,))
+
+
+def calculate_bijtelling(
+    cataloguswaarde: np.ndarray, is_ev: np.ndarray, terms: LeaseTerms
+) -> tuple[np.ndarray, np.ndarray]:
+    """Annual bijtelling per car: (gross, net after tax)"""
+    low_part = np.where(
+        is_ev,
+        np.minimum(cataloguswaarde, terms.ev_threshold) * terms.bijtelling_rate_ev_low,
+        0.0,
+    )
+    high_part = (
+        np.where(
+            is_ev,
+            np.maximum(0.0, cataloguswaarde - terms.ev_threshold),
+            cataloguswaarde,
+        )
+        * terms.bijtelling_rate_standard
+    )
+    annual_gross = low_part + high_part
+    return annual_gross, annual_gross * terms.tax_rate_on_bijtelling
+
+
+def business_lease_monthly(
+    fleet: FleetArrays,
+    n_months: int,
+    n_kilometer_per_year: int | Sequence[int],
+    terms: LeaseTerms = LeaseTerms(),
+    bijtelling_net: np.ndarray | None = None,
+) -> np.ndarray:
+    """Net bijtelling + lost mobility budget + lease above budget; fuel is company-paid.
+
+    The purchase cost stands in for the catalogue value. `bijtelling_net` is an
+    optional (cars, months) monthly net bijtelling from tax_rules.py that
+    replaces the flat rates in `terms`.
+    """
+    lost_mobility_monthly = terms.mobility_budget_gross_monthly * (
+        1 - terms.tax_rate_on_bijtelling
+    )
+    excess_lease = np.maximum(
+        0.0, fleet.monthly_lease - terms.mobility_budget_gross_monthly
+    )
+    # km does not enter the business lease, but keep the same shape as the others
+    shape = np.broadcast_shapes(
+        _km_levels(n_kilometer_per_year).shape, excess_lease.shape
+    ) + (n_months,)
+    if bijtelling_net is not None:
+        monthly = bijtelling_net + (lost_mobility_monthly + excess_lease)[:, None]
+        return np.broadcast_to(monthly, shape)
+    _, annual_net = calculate_bijtelling(fleet.purchase_cost, fleet.is_ev, terms)
+    monthly = annual_net / 12 + lost_mobility_monthly + excess_lease
+    return np.broadcast_to(monthly[..., None], shape)
+
+
+def ownership_costs(
+    fleet: FleetArrays,
+    n_years: int,
+    n_kilometer_per_year: int | Sequence[int],
+    terms: LeaseTerms = LeaseTerms(),
+    tax_tables: TaxTables | None = None,
+    rule_sets=None,
+) -> dict[str, np.ndarray]:
+    """Cumulative costs for every ownership type, keyed as in OWNERSHIP_TYPES.
+
+    With `tax_tables`, road tax and bijtelling follow the compiled rules (per
+    car `rule_sets`, default "ev"/"ice") instead of the flat values.
+    Lease scenarios are NaN for cars without a monthly_lease.
+    """
+    n_months = n_years * 12
+    road_tax = bijtelling_net = None
+    if tax_tables is not None:
+        from tax_rules import bijtelling_monthly_net, road_tax_monthly
+
+        road_tax = road_tax_monthly(tax_tables, fleet, n_months, rule_sets)
+        bijtelling_net = bijtelling_monthly_net(
+            tax_tables, fleet, n_months, terms.tax_rate_on_bijtelling, rule_sets
+        )
+    return {
+        "buy": accumulate(
+            cash_purchase_monthly(fleet, n_months, n_kilometer_per_year, road_tax)
+        ),
+        "personal_lease": accumulate(
+            personal_lease_monthly(fleet, n_months, n_kilometer_per_year)
+        ),
+        "business_lease": accumulate(
+            business_lease_monthly(
+                fleet, n_months, n_kilometer_per_year, terms, bijtelling_net
+            )
+        ),
+    }
+
+
+def fleet_monthly_costs(
+    fleet: FleetArrays,
+    n_months: int,
+    n_kilometer_per_year: int | Sequence[int],
+    road_tax: np.ndarray | None = None,
+) -> np.ndarray:
+    """Monthly costs per car under its own Car.type: personal lease or cash buy"""
+    is_lease = lease_mask(fleet)
+    buy = cash_purchase_monthly(fleet, n_months, n_kilometer_per_year, road_tax)
+    if not is_lease.any():
+        return buy
+    lease = personal_lease_monthly(fleet, n_months, n_kilometer_per_year)
+    return np.where(is_lease[:, None], lease, buy)
+
+
+def compare_ownership(
+    df: pl.DataFrame,
+    n_years: int,
+    n_kilometer_per_year: int | Sequence[int],
+    terms: LeaseTerms = LeaseTerms(),
+) -> pl.DataFrame:
+    """Long frame of final costs: one row per car, km level and ownership type"""
+    import polars as pl
+
+    from fleet import FleetArrays
+
+    kms = np.atleast_1d(n_kilometer_per_year)
+    results = ownership_costs(FleetArrays.from_polars(df), n_years, kms, terms)
+    frames = [
+        df.select("id", "name").with_columns(
+            pl.lit(int(km), dtype=pl.Int64).alias("n_kilometer_per_year"),
+            pl.lit(ownership).alias("ownership"),
+            pl.Series("final_cost", costs[level, :, -1]),
+        )
+        for ownership, costs in results.items()
+        for level, km in enumerate(kms)
+    ]
+    return pl.concat(frames)
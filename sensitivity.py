@@ -0,0 +1,110 @@
+# sensitivity.py
+"""Analytic sensitivities of cumulative cost, without re-simulating.
+
+Works on the continuous model (no per-step cent rounding), which differs from
+the simulated series by at most a few cents. For month n, a buy car costs
+
+    C(n) = sum_i [ tax/12 + insurance + km/12 * fuel + 0.06 p/12
+                   + k/12 * max(p exp(-k t_i), 0.2 p) ]
+
+and a lease car costs n * (monthly_lease + km/12 * fuel). So C is linear in
+km/year, fuel_per_km and insurance_monthly, and dC/dk follows from the
+exponential: d/dk [k/12 p exp(-k t)] = p exp(-k t) (1 - k t) / 12, or 0.2 p / 12
+once the value sits on the residual floor.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import polars as pl
+
+    from fleet import FleetArrays
+    from tax_rules import TaxTables
+
+PARAMETERS = (
+    "n_kilometer_per_year",
+    "fuel_per_km",
+    "insurance_monthly",
+    "depreciation_k",
+)
+
+
+def cost_gradients(
+    fleet: FleetArrays, n_years: int, n_kilometer_per_year: int
+) -> dict[str, np.ndarray]:
+    """d(cumulative cost)/d(parameter) per car and month, keyed as in PARAMETERS"""
+    from scenarios import depreciation_terms, lease_mask
+
+    n_months = n_years * 12
+    months = np.arange(1, n_months + 1)
+    is_buy = ~lease_mask(fleet)
+
+    # Same decay and floor as the simulation, so the two cannot drift apart
+    t, decayed, residual = depreciation_terms(fleet, n_months)
+    k = fleet.depreciation_k[:, None]
+    d_depreciation_dk = np.where(
+        decayed <= residual, residual / 12.0, decayed * (1 - k * t) / 12.0
+    )
+
+    return {
+        "n_kilometer_per_year": (fleet.fuel_per_km / 12)[:, None] * months,
+        "fuel_per_km": np.broadcast_to(
+            n_kilometer_per_year / 12 * months, (len(fleet), n_months)
+        ),
+        "insurance_monthly": np.where(is_buy[:, None], months, 0.0),
+        "depreciation_k": np.where(
+            is_buy[:, None], np.cumsum(d_depreciation_dk, axis=1), 0.0
+        ),
+    }
+
+
+def break_even_km(
+    fleet: FleetArrays,
+    n_years: int,
+    month: int = -1,
+    tax_tables: TaxTables | None = None,
+) -> np.ndarray:
+    """(cars, cars) km/year at which car i and car j cost the same by `month`.
+
+    C_i(km) = a_i + b_i * km, so km* = (a_j - a_i) / (b_i - b_j). Entry [i, j]
+    is NaN if the lines are parallel or cross at negative km; for km above
+    km*, the car with the smaller fuel_per_km is the cheaper one.
+    """
+    from scenarios import fleet_monthly_costs
+
+    n_months = n_years * 12
+    road_tax = None
+    if tax_tables is not None:
+        from tax_rules import road_tax_monthly
+
+        road_tax = road_tax_monthly(tax_tables, fleet, n_months)
+    # Intercept: cumulative cost when driving 0 km; slope: cost per km/year
+    fixed = np.cumsum(fleet_monthly_costs(fleet, n_months, 0, road_tax), axis=1)
+    a = fixed[:, month]
+    b = fleet.fuel_per_km / 12 * np.arange(1, n_months + 1)[month]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        km = (a[None, :] - a[:, None]) / (b[:, None] - b[None, :])
+    km[~np.isfinite(km) | (km < 0)] = np.nan
+    return km
+
+
+def sensitivity_frame(
+    df: pl.DataFrame, n_years: int, n_kilometer_per_year: int
+) -> pl.DataFrame:
+    """Per car: change in total cost at the horizon per unit of each parameter"""
+    import polars as pl
+
+    from fleet import FleetArrays
+
+    gradients = cost_gradients(
+        FleetArrays.from_polars(df), n_years, n_kilometer_per_year
+    )
+    return df.select("id", "name").with_columns(
+        pl.Series(f"d_total_d_{name}", gradient[:, -1])
+        for name, gradient in gradients.items()
+    )
@@ -0,0 +1,6 @@
+# wsgi.py
+"""Production entry point: gunicorn -c gunicorn.conf.py wsgi:server"""
+
+from main import server
+
+__all__ = ["server"]